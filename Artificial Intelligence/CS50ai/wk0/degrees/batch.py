@@ -0,0 +1,134 @@
+"""
+Answer many degrees-of-separation queries from a file across a process pool
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+
+import degrees
+
+CHUNKSIZE = 64
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Find shortest paths for (source, target) person id pairs."
+    )
+    parser.add_argument("directory", help="data directory (CSVs or snapshot)")
+    parser.add_argument("pairs", help="CSV with source,target columns, or JSONL")
+    parser.add_argument("output", help="JSONL file to write results to")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--bidirectional", action="store_true")
+    args = parser.parse_args()
+
+    print("Loading data...")
+    degrees.load_data(args.directory, compact=True)
+    print("Data loaded.")
+
+    count = run_batch(
+        args.directory, args.pairs, args.output, args.workers, args.bidirectional
+    )
+    print(f"Wrote {count} results to {args.output}.")
+
+
+def run_batch(directory, pairs_path, output_path, workers=1, bidirectional=False):
+    """
+    Answer every pair in `pairs_path` and write one JSON line per pair
+    to `output_path`, in input order, as results arrive.
+    Returns the number of pairs answered.
+
+    Workers inherit the already loaded graph through fork, so the
+    adjacency arrays (or snapshot mapping) are shared rather than pickled.
+    """
+    pairs = read_pairs(pairs_path)
+    count = 0
+    with open(output_path, "w", encoding="utf-8") as f:
+        for result in answer_all(directory, pairs, workers, bidirectional):
+            f.write(json.dumps(result) + "\n")
+            count += 1
+    return count
+
+
+def answer_all(directory, pairs, workers, bidirectional):
+    """
+    Yields the result for each pair, in order, answering them
+    in this process when `workers` is 1 and in a pool otherwise.
+    """
+    if workers <= 1:
+        init_worker(directory, bidirectional)
+        yield from map(answer, pairs)
+        return
+
+    with pool_context().Pool(
+        workers, initializer=init_worker, initargs=(directory, bidirectional)
+    ) as pool:
+        yield from pool.imap(answer, pairs, chunksize=CHUNKSIZE)
+
+
+def read_pairs(path):
+    """
+    Yields (source, target) person id pairs from a CSV file with
+    `source` and `target` columns, or from a JSONL file of objects
+    with `source` and `target` keys.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith((".jsonl", ".json")):
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    yield str(row["source"]), str(row["target"])
+        else:
+            for row in csv.DictReader(f):
+                yield row["source"], row["target"]
+
+
+def pool_context():
+    """
+    Returns a fork context where available, so workers share the
+    parent's graph, falling back to spawn elsewhere.
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context("spawn")
+
+
+# Search mode used by answer(), set in each worker by init_worker()
+bidirectional_search = False
+
+
+def init_worker(directory, bidirectional):
+    """
+    Prepare a worker process, loading the graph only if it
+    was not inherited from the parent.
+    """
+    global bidirectional_search
+    bidirectional_search = bidirectional
+    if degrees.graph is None:
+        degrees.load_data(directory, compact=True)
+
+
+def answer(pair):
+    """
+    Returns the result record for a (source, target) pair.
+    """
+    source, target = pair
+    result = {"source": source, "target": target}
+    for person_id in pair:
+        if degrees.graph.person_index(person_id) is None:
+            result["error"] = f"unknown person {person_id}"
+            return result
+
+    path = degrees.shortest_path(source, target, bidirectional_search)
+    if path is None:
+        result["degrees"] = None
+        result["path"] = None
+    else:
+        result["degrees"] = len(path)
+        result["path"] = [list(step) for step in path]
+    return result
+
+
+if __name__ == "__main__":
+    main()
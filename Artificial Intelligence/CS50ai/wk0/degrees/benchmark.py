@@ -0,0 +1,213 @@
+"""
+Benchmark loading and searching a degrees dataset at scale
+
+Each mode is measured in a fresh interpreter so that its peak RSS is its
+own. Results are printed (and optionally written) as JSON:
+
+    {
+        "directory": ..., "queries": ..., "seed": ...,
+        "results": [
+            {
+                "mode": "compact", "load_seconds": ..., "peak_rss_bytes": ...,
+                "people": ..., "movies": ..., "stars": ...,
+                "searches": {
+                    "bidirectional": {
+                        "connected": ..., "mean_degrees": ...,
+                        "latency_ms": {"mean", "p50", "p99", "max"},
+                        "expanded": {"mean", "p50", "p99", "max"},
+                        "pushes": {...}, "peak_size": {...}
+                    },
+                    ...
+                }
+            },
+            ...
+        ]
+    }
+"""
+
+import argparse
+import json
+import random
+import resource
+import subprocess
+import sys
+import time
+
+import degrees
+import snapshot
+from graph import CompactGraph
+from synthetic import generate
+
+MODES = ["dict", "compact", "snapshot"]
+SEARCHES = ["unidirectional", "bidirectional"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark degrees loading and search.")
+    parser.add_argument("directory", help="data directory")
+    parser.add_argument("--generate", nargs=3, type=int, metavar=("PEOPLE", "MOVIES", "STARS"),
+                        help="first write a power-law synthetic dataset of this size")
+    parser.add_argument("--modes", default=",".join(MODES),
+                        help="comma-separated subset of " + ",".join(MODES))
+    parser.add_argument("--searches", default=",".join(SEARCHES),
+                        help="comma-separated subset of " + ",".join(SEARCHES))
+    parser.add_argument("--components", action="store_true",
+                        help="compute components so disconnected pairs skip the search")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the JSON to this file")
+    parser.add_argument("--measure", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    searches = args.searches.split(",")
+    if args.measure:
+        # Child process: measure one mode and report on stdout
+        print(json.dumps(measure(args.measure, args.directory, searches,
+                                 args.components, args.queries, args.seed)))
+        return
+
+    modes = args.modes.split(",")
+    for name in modes + searches:
+        if name not in MODES + SEARCHES:
+            sys.exit(f"Unknown mode or search {name}")
+
+    if args.generate:
+        print(f"Generating {' '.join(map(str, args.generate))}...", file=sys.stderr)
+        generate(args.directory, *args.generate, seed=args.seed)
+    snapshot.remove_journal(args.directory)
+    if "snapshot" in modes:
+        snapshot.write_snapshot(
+            CompactGraph.from_csv(args.directory), snapshot.snapshot_path(args.directory)
+        )
+
+    results = []
+    for mode in modes:
+        print(f"Measuring {mode}...", file=sys.stderr)
+        command = [
+            sys.executable, __file__, args.directory, "--measure", mode,
+            "--searches", ",".join(searches),
+            "--queries", str(args.queries), "--seed", str(args.seed)
+        ]
+        if args.components:
+            command.append("--components")
+        child = subprocess.run(command, check=True, capture_output=True, text=True)
+        results.append(json.loads(child.stdout.splitlines()[-1]))
+
+    report = json.dumps({
+        "directory": args.directory,
+        "queries": args.queries,
+        "seed": args.seed,
+        "components": args.components,
+        "results": results
+    }, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+
+
+def measure(mode, directory, searches, components, queries, seed):
+    """
+    Load `directory` in the given mode, run `queries` random shortest-path
+    queries with each search, and return the measurements as a dict.
+    """
+    start = time.perf_counter()
+    if mode == "snapshot":
+        degrees.read_data(directory, compact=True)
+    elif mode == "compact":
+        degrees.graph = CompactGraph.from_csv(directory)
+    else:
+        degrees.read_csv(directory)
+    if components:
+        degrees.compute_components()
+    load_seconds = time.perf_counter() - start
+    load_rss = peak_rss()
+
+    # Ids sorted so every mode asks the same questions
+    if degrees.graph is not None:
+        ids = list(degrees.graph.person_ids)
+        movies = degrees.graph.movie_count
+        stars = degrees.graph.edge_count
+    else:
+        ids = sorted(degrees.people)
+        movies = len(degrees.movies)
+        stars = sum(len(person["movies"]) for person in degrees.people.values())
+    rng = random.Random(seed)
+    pairs = [(rng.choice(ids), rng.choice(ids)) for _ in range(queries)]
+
+    result = {
+        "mode": mode,
+        "people": len(ids),
+        "movies": movies,
+        "stars": stars,
+        "load_seconds": round(load_seconds, 3),
+        "load_peak_rss_bytes": load_rss,
+        "searches": {}
+    }
+    for search in searches:
+        result["searches"][search] = run_queries(pairs, search == "bidirectional")
+    result["peak_rss_bytes"] = peak_rss()
+    return result
+
+
+def run_queries(pairs, bidirectional):
+    """
+    Answer every (source, target) pair and summarise latency,
+    the search counters and path lengths.
+    """
+    latencies = []
+    counters = {"expanded": [], "pushes": [], "peak_size": []}
+    lengths = []
+    for source, target in pairs:
+        start = time.perf_counter()
+        path = degrees.shortest_path(source, target, bidirectional)
+        latencies.append((time.perf_counter() - start) * 1000)
+        for key, values in counters.items():
+            values.append(degrees.search_stats[key])
+        if path is not None:
+            lengths.append(len(path))
+
+    result = {
+        "connected": len(lengths),
+        "mean_degrees": round(sum(lengths) / len(lengths), 3) if lengths else None,
+        "latency_ms": summarise(latencies, 3)
+    }
+    for key, values in counters.items():
+        result[key] = summarise(values, 1)
+    return result
+
+
+def summarise(values, digits):
+    """
+    Returns the mean, median, 99th percentile and maximum of `values`.
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    return {
+        "mean": round(sum(values) / len(values), digits),
+        "p50": round(percentile(values, 50), digits),
+        "p99": round(percentile(values, 99), digits),
+        "max": round(values[-1], digits)
+    }
+
+
+def percentile(values, percent):
+    """
+    Nearest-rank percentile of a sorted list.
+    """
+    rank = -(-percent * len(values) // 100)
+    return values[max(0, rank - 1)]
+
+
+def peak_rss():
+    """
+    Returns the peak resident set size of this process in bytes.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+if __name__ == "__main__":
+    main()
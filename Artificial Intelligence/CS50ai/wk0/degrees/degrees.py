@@ -1,6 +1,9 @@
 import csv
 import sys
 
+import snapshot
+from graph import CompactGraph, Components, find_components
+from nameindex import NameIndex
 from util import Node, StackFrontier, QueueFrontier
 
 # Maps names to a set of corresponding person_ids
@@ -12,10 +15,72 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# CompactGraph used in place of the dicts above when loaded with compact=True
+graph = None
 
-def load_data(directory):
+# Components of the person graph, when loaded with components=True
+components = None
+
+# NameIndex for autocomplete and suggestions, when loaded with name_index=True
+name_index = None
+
+# Incremented whenever apply_updates changes the loaded data, so caches
+# built over an earlier version can tell they are stale
+generation = 0
+
+# Counters describing the most recent call to shortest_path: people
+# expanded, frontier pushes and pops, the frontier's peak size, and
+# neighbors rejected because they had already been reached
+search_stats = {"expanded": 0, "pushes": 0, "pops": 0, "peak_size": 0, "duplicates": 0}
+
+
+def load_data(directory, compact=False, components=False, name_index=False):
     """
     Load data from CSV files into memory.
+
+    If `compact` is True the data is loaded into an integer-indexed
+    `CompactGraph` instead of the `names`, `people` and `movies` dicts,
+    which takes a fraction of the memory on large datasets.
+
+    If the directory holds a snapshot (see snapshot.py) newer than
+    the CSV files, the graph is mapped from it instead of parsed.
+
+    If `components` is True the connected components of the person graph
+    are computed too, so that shortest_path can answer disconnected
+    pairs without searching.
+
+    If `name_index` is True a NameIndex over everyone's names is built
+    for autocomplete and "did you mean" lookups.
+    """
+    read_data(directory, compact)
+    if components:
+        compute_components()
+    if name_index:
+        build_name_index()
+
+
+def read_data(directory, compact):
+    """
+    Load the graph, from a snapshot when possible.
+    """
+    global graph
+    if snapshot.is_fresh(directory):
+        try:
+            graph = snapshot.open_snapshot(snapshot.snapshot_path(directory))
+            snapshot.replay_journal(directory, graph)
+            return
+        except ValueError as error:
+            print(f"Ignoring snapshot: {error}")
+
+    if compact:
+        graph = CompactGraph.from_csv(directory)
+    else:
+        read_csv(directory)
+
+
+def read_csv(directory):
+    """
+    Load the CSV files into the `names`, `people` and `movies` dicts.
     """
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
@@ -52,24 +117,162 @@ def load_data(directory):
                 pass
 
 
+def apply_updates(directory, new_people=(), new_movies=(), new_stars=()):
+    """
+    Add people, movies and stars rows (dicts with the CSV columns) to the
+    loaded data and append them to the CSV files in `directory`, without
+    reloading anything.
+
+    Rows for ids that are already loaded, stars naming unknown ids and
+    stars already present are skipped, and are not written to the files
+    either, so a later load from the files sees what is in memory.
+    Returns the people, movies and stars rows that were added.
+
+    If the directory's snapshot was up to date the rows are journaled
+    next to it, so it stays usable until it is next compiled.
+    Components and the name index are updated in place if they were
+    loaded, and `generation` is bumped so other caches can drop stale
+    entries.
+    """
+    global generation
+    had_fresh_snapshot = snapshot.is_fresh(directory)
+
+    # Update the loaded data
+    if graph is not None:
+        new_people, new_movies, new_stars = graph.add_rows(new_people, new_movies, new_stars)
+    else:
+        new_people, new_movies, new_stars = add_rows(new_people, new_movies, new_stars)
+
+    # Update the files on disk
+    append_csv(f"{directory}/people.csv", new_people)
+    append_csv(f"{directory}/movies.csv", new_movies)
+    append_csv(f"{directory}/stars.csv", new_stars)
+    if had_fresh_snapshot:
+        snapshot.append_journal(directory, new_people, new_movies, new_stars)
+    else:
+        snapshot.remove_journal(directory)
+
+    # Bring what is derived from the data up to date
+    generation += 1
+    if components is not None:
+        update_components(new_people, new_stars)
+    if name_index is not None:
+        name_index.add(row["name"] for row in new_people)
+    return new_people, new_movies, new_stars
+
+
+def add_rows(new_people, new_movies, new_stars):
+    """
+    Add rows to the `names`, `people` and `movies` dicts, skipping the
+    same rows as CompactGraph.add_rows. Returns the rows that were added.
+    """
+    added_people, added_movies, added_stars = [], [], []
+    for row in new_people:
+        if row["id"] in people:
+            continue
+        people[row["id"]] = {"name": row["name"], "birth": row["birth"], "movies": set()}
+        names.setdefault(row["name"].lower(), set()).add(row["id"])
+        added_people.append(row)
+    for row in new_movies:
+        if row["id"] in movies:
+            continue
+        movies[row["id"]] = {"title": row["title"], "year": row["year"], "stars": set()}
+        added_movies.append(row)
+    for row in new_stars:
+        person = people.get(row["person_id"])
+        if person is None or row["movie_id"] not in movies or row["movie_id"] in person["movies"]:
+            continue
+        person["movies"].add(row["movie_id"])
+        movies[row["movie_id"]]["stars"].add(row["person_id"])
+        added_stars.append(row)
+    return added_people, added_movies, added_stars
+
+
+def append_csv(path, rows):
+    """
+    Append dict rows to a CSV file, in the order of its header.
+    """
+    if not rows:
+        return
+    with open(path, encoding="utf-8", newline="") as f:
+        header = next(csv.reader(f))
+    with open(path, "a", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=header)
+        writer.writerows(rows)
+
+
+def compute_components():
+    """
+    Label every person with its connected component,
+    by union-find over the cast of every movie.
+    """
+    global components
+    if graph is not None:
+        labels, sizes = find_components(
+            graph.person_count,
+            (graph.people_for_movie(movie) for movie in range(graph.movie_count))
+        )
+        components = Components(labels, sizes)
+        return
+
+    person_ids = list(people)
+    index = {person_id: i for i, person_id in enumerate(person_ids)}
+    labels, sizes = find_components(
+        len(person_ids),
+        ([index[person_id] for person_id in movie["stars"]] for movie in movies.values())
+    )
+    components = Components(dict(zip(person_ids, labels)), sizes)
+
+
+def update_components(new_people, new_stars):
+    """
+    Update `components` for rows added by apply_updates: new people start
+    in components of their own, and new stars can only merge components,
+    so the casts of the movies they were added to are joined.
+    """
+    if graph is not None:
+        for row in new_people:
+            components.add_person(graph.person_index(row["id"]))
+        for movie in {graph.movie_index(row["movie_id"]) for row in new_stars}:
+            components.join(graph.people_for_movie(movie), graph.neighbors)
+        return
+
+    for row in new_people:
+        components.add_person(row["id"])
+    for movie_id in {row["movie_id"] for row in new_stars}:
+        components.join(movies[movie_id]["stars"], neighbors_for_person)
+
+
+def build_name_index():
+    """
+    Index every person's name for prefix and fuzzy lookups.
+    """
+    global name_index
+    if graph is not None:
+        name_index = NameIndex(graph.person_names)
+    else:
+        name_index = NameIndex(person["name"] for person in people.values())
+
+
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    args = sys.argv[1:]
+    flags = ("--compact", "--bidirectional", "--components", "--suggest")
+    compact, bidirectional, with_components, suggest = (flag in args for flag in flags)
+    args = [arg for arg in args if arg not in flags]
+    if len(args) > 1:
+        sys.exit("Usage: python degrees.py [directory] "
+                 "[--compact] [--bidirectional] [--components] [--suggest]")
+    directory = args[0] if len(args) == 1 else "large"
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, compact, with_components, suggest)
     print("Data loaded.")
 
-    source = person_id_for_name(input("Name: "))
-    if source is None:
-        sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
-    if target is None:
-        sys.exit("Person not found.")
+    source = ask_for_person()
+    target = ask_for_person()
 
-    path = shortest_path(source, target)
+    path = shortest_path(source, target, bidirectional)
 
     if path is None:
         print("Not connected.")
@@ -78,48 +281,112 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = person_name(path[i][1])
+            person2 = person_name(path[i + 1][1])
+            movie = movie_title(path[i + 1][0])
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def ask_for_person():
+    """
+    Prompts for a name and returns the matching person id, exiting
+    (with suggestions if a name index is loaded) when there is none.
+    """
+    name = input("Name: ")
+    person_id = person_id_for_name(name)
+    if person_id is not None:
+        return person_id
+    if name_index is not None:
+        suggestions = suggest_names(name)
+        if suggestions:
+            sys.exit(f"Person not found. Did you mean: {', '.join(suggestions)}?")
+    sys.exit("Person not found.")
+
+
+def shortest_path(source, target, bidirectional=False):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If `bidirectional` is True the search grows from both ends at once,
+    otherwise it expands a single frontier out from the source.
+    How much work the search did is left in `search_stats`.
+
+    If components were computed by load_data, people in different
+    components are reported as not connected without searching.
+
+    If either person id is unknown, or no possible path, returns None.
+    """
+    search = bidirectional_search if bidirectional else breadth_first_search
+
+    if graph is not None:
+        source = graph.person_index(source)
+        target = graph.person_index(target)
+        known = source is not None and target is not None
+    else:
+        known = source in people and target in people
+    if not known:
+        reset_search_stats()
+        return None
+
+    # People in different components are never connected
+    if components is not None and not components.connected(source, target):
+        reset_search_stats()
+        return None
+
+    if graph is not None:
+        # Search over integer indexes and translate the result back to ids
+        return graph.external_path(search(source, target, graph.neighbors))
+
+    return search(source, target, neighbors_for_person)
+
+
+def breadth_first_search(source, target, neighbors):
+    """
+    Returns the shortest list of (action, state) pairs connecting
+    source to target, where `neighbors(state)` yields the
+    (action, state) pairs reachable from a state.
+
     If no possible path, returns None.
     """
-    # Create array of people already checked on
-    already_seen = [source]
+    # Create set of people already checked on
+    explored = set()
     # Create a path to write to once it has been found
     path = []
-    
+
     # Use Queue frontier
     frontier = QueueFrontier()
-    
+
     # Initialize source
     start = Node(source, None, None)
-    
+
     # Add the source to the frontier
     frontier.add(start)
-    
+
+    reset_search_stats()
+
     # Search for target node while there nodes to explore
     while not frontier.empty():
         current = frontier.remove()
-         
+
         if current.state == target:
             while current.parent is not None:
                 path.append(current.action)
                 current = current.parent
-            
-        # Get neighbors for current person
-        neighbors = neighbors_for_person(current.state)
-        # Check list of returned tuples for the target person
-        for neighbor in neighbors:
+            path.reverse()
+            record_frontier(frontier)
+            return path
+
+        # Mark person as checked on
+        explored.add(current.state)
+
+        # Check neighbors of current person for the target person
+        search_stats["expanded"] += 1
+        for neighbor in neighbors(current.state):
             # Iterate over the people and create a node for every person not already seen
-            if neighbor[1] not in already_seen:
+            if neighbor[1] in explored or frontier.contains_state(neighbor[1]):
+                search_stats["duplicates"] += 1
+            else:
                 # Check for id of the target
                 if neighbor[1] == target:
                     # If the state is target person add to path (movie from parent, state)
@@ -130,35 +397,149 @@ def shortest_path(source, target):
                         current = current.parent
                     # Return the path inversed
                     path.reverse()
+                    record_frontier(frontier)
                     return path
-                
+
                 # Create node for neighbor
                 # State is the current neighbor ID
                 # Parent is the current node
-                # Action is a tuple (movie, state) that linked person to parent 
+                # Action is a tuple (movie, state) that linked person to parent
                 person = Node(neighbor[1], current, (neighbor[0], neighbor[1]))
 
-                # Mark person as seen
-                already_seen.append(neighbor[1])
-
                 # Add person to frontier
                 frontier.add(person)
 
+    record_frontier(frontier)
+    return None
+
+
+def reset_search_stats():
+    for key in search_stats:
+        search_stats[key] = 0
+
+
+def record_frontier(frontier):
+    """
+    Copy a frontier's push, pop and size counters into `search_stats`.
+    """
+    stats = frontier.stats()
+    for key in ("pushes", "pops", "peak_size"):
+        search_stats[key] = stats[key]
+
+
+def bidirectional_search(source, target, neighbors, prune=None):
+    """
+    Returns the shortest list of (action, state) pairs connecting
+    source to target, growing one frontier from each end and always
+    expanding a whole level of the smaller one.
+
+    `neighbors` must be symmetric, as the co-star relation is.
+
+    If given, `prune(state, depth, forward)` is called before a state is
+    expanded and returning True skips its neighbors; it must only skip
+    states that cannot lie on a shortest path.
+
+    If no possible path, returns None.
+    """
+    reset_search_stats()
+    if source == target:
+        return []
+
+    # Map each state reached to (previous state, action, depth) on its side
+    forward = {source: (None, None, 0)}
+    backward = {target: (None, None, 0)}
+    forward_frontier = [source]
+    backward_frontier = [target]
+    duplicates = 0
+
+    while forward_frontier and backward_frontier:
+        search_stats["peak_size"] = max(
+            search_stats["peak_size"], len(forward_frontier) + len(backward_frontier)
+        )
+
+        # Expand the smaller side
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, seen, other = forward_frontier, forward, backward
+        else:
+            frontier, seen, other = backward_frontier, backward, forward
+        is_forward = seen is forward
+        search_stats["pops"] += len(frontier)
+
+        next_frontier = []
+        best = None
+        for state in frontier:
+            depth = seen[state][2]
+            if prune is not None and prune(state, depth, is_forward):
+                continue
+            search_stats["expanded"] += 1
+            depth += 1
+            for action, neighbor in neighbors(state):
+                if neighbor in seen:
+                    duplicates += 1
+                    continue
+                seen[neighbor] = (state, action, depth)
+                next_frontier.append(neighbor)
+                # Keep the shortest meeting point found in this level
+                if neighbor in other:
+                    length = depth + other[neighbor][2]
+                    if best is None or length < best[0]:
+                        best = (length, neighbor)
+
+        if best is not None:
+            break
+
+        if is_forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    # Every state reached was pushed onto a frontier once
+    search_stats["pushes"] = len(forward) + len(backward)
+    search_stats["duplicates"] = duplicates
+
+    if best is not None:
+        return join_paths(best[1], forward, backward)
+    return None
+
+
+def join_paths(meeting, forward, backward):
+    """
+    Joins the forward and backward half-paths through `meeting`
+    into a single list of (action, state) pairs.
+    """
+    path = []
+
+    # Walk back from the meeting point to the source
+    state = meeting
+    while forward[state][0] is not None:
+        previous, action, _ = forward[state]
+        path.append((action, state))
+        state = previous
+    path.reverse()
+
+    # Walk on from the meeting point to the target
+    state = meeting
+    while backward[state][0] is not None:
+        following, action, _ = backward[state]
+        path.append((action, following))
+        state = following
+
+    return path
+
 
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = person_ids_for_name(name)
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
+            name = person_name(person_id)
+            birth = person_birth(person_id)
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
         try:
             person_id = input("Intended Person ID: ")
@@ -171,11 +552,71 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def person_ids_for_name(name):
+    """
+    Returns the list of IMDB ids for people with a given name.
+    """
+    if graph is not None:
+        return graph.person_ids_for_name(name)
+    return list(names.get(name.lower(), set()))
+
+
+def complete_name(prefix, limit=10):
+    """
+    Returns up to `limit` names starting with `prefix`.
+    """
+    if name_index is None:
+        build_name_index()
+    return name_index.complete(prefix, limit)
+
+
+def suggest_names(name, limit=5):
+    """
+    Returns up to `limit` names close to `name`, closest first.
+    """
+    if name_index is None:
+        build_name_index()
+    return [suggestion for suggestion, _ in name_index.suggest(name, limit=limit)]
+
+
+def person_name(person_id):
+    """
+    Returns the name of a person.
+    """
+    if graph is not None:
+        return graph.person_names[graph.person_index(person_id)]
+    return people[person_id]["name"]
+
+
+def person_birth(person_id):
+    """
+    Returns the birth year of a person.
+    """
+    if graph is not None:
+        return graph.person_births[graph.person_index(person_id)]
+    return people[person_id]["birth"]
+
+
+def movie_title(movie_id):
+    """
+    Returns the title of a movie.
+    """
+    if graph is not None:
+        return graph.movie_titles[graph.movie_index(movie_id)]
+    return movies[movie_id]["title"]
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return {
+            (graph.movie_ids[movie], graph.person_ids[person])
+            for movie, person in graph.neighbors(graph.person_index(person_id))
+        }
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
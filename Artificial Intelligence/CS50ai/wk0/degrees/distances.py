@@ -0,0 +1,137 @@
+"""
+Distance from one person to every other person ("Bacon numbers")
+
+Level-synchronous BFS over a CompactGraph in which each level's frontier
+is expanded with NumPy gathers over the CSR arrays instead of Python loops.
+"""
+
+import csv
+import sys
+
+import numpy as np
+
+import degrees
+
+
+def main():
+    if len(sys.argv) != 4:
+        sys.exit("Usage: python distances.py directory person output.csv")
+    directory, person, output = sys.argv[1:]
+
+    print("Loading data...")
+    degrees.load_data(directory, compact=True)
+    print("Data loaded.")
+
+    # Accept either an IMDb id or a name
+    source = person if degrees.graph.person_index(person) is not None \
+        else degrees.person_id_for_name(person)
+    if source is None:
+        sys.exit("Person not found.")
+
+    count = write_distances(degrees.graph, source, output)
+    print(f"Wrote {count} people to {output}.")
+
+
+def write_distances(graph, source_id, path):
+    """
+    Write a (person_id, distance, via_movie) CSV row for every person
+    connected to `source_id`, level by level as the BFS proceeds.
+    `via_movie` is the movie linking a person to someone one step closer.
+    Returns the number of rows written.
+    """
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "distance", "via_movie"])
+        for distance, people, via in bfs_levels(graph, graph.person_index(source_id)):
+            writer.writerows(
+                (graph.person_ids[person], distance,
+                 graph.movie_ids[movie] if movie >= 0 else "")
+                for person, movie in zip(people.tolist(), via.tolist())
+            )
+            count += len(people)
+    return count
+
+
+def bfs_levels(graph, source):
+    """
+    Yields (distance, people, via_movies) for each BFS level from a
+    person index, as NumPy arrays of the people first reached at that
+    distance and a movie linking each to the previous level
+    (-1 for the source itself).
+
+    Only the CSR arrays are read, so rows added by degrees.apply_updates
+    must first be compiled into a new snapshot.
+    """
+    if graph.has_updates:
+        raise ValueError("graph has rows added since it was built; recompile its snapshot")
+
+    person_offsets = as_array(graph.person_offsets)
+    person_movies = as_array(graph.person_movies)
+    movie_offsets = as_array(graph.movie_offsets)
+    movie_people = as_array(graph.movie_people)
+
+    reached = np.zeros(graph.person_count, dtype=bool)
+    seen_movies = np.zeros(graph.movie_count, dtype=bool)
+    via_movies = np.full(graph.person_count, -1, dtype=np.int64)
+
+    frontier = np.array([source], dtype=np.int64)
+    reached[source] = True
+    yield 0, frontier, via_movies[frontier]
+
+    distance = 0
+    while frontier.size:
+        distance += 1
+
+        # Movies of the frontier not scanned at an earlier level,
+        # deduplicated by marking rather than sorting
+        movies, _ = gather(person_offsets, person_movies, frontier)
+        level_movies = np.zeros(graph.movie_count, dtype=bool)
+        level_movies[movies] = True
+        level_movies &= ~seen_movies
+        seen_movies |= level_movies
+        movies = np.flatnonzero(level_movies)
+
+        # Their casts; writing in reverse keeps the first movie found
+        people, via = gather(movie_offsets, movie_people, movies)
+        fresh = ~reached[people]
+        people = people[fresh]
+        via_movies[people[::-1]] = via[fresh][::-1]
+        level_people = np.zeros(graph.person_count, dtype=bool)
+        level_people[people] = True
+        reached |= level_people
+        people = np.flatnonzero(level_people)
+
+        if people.size:
+            yield distance, people, via_movies[people]
+        frontier = people
+
+
+def gather(offsets, adjacency, nodes):
+    """
+    Returns (targets, owners): the concatenated adjacency rows of `nodes`
+    and, for each target, the node whose row it came from.
+    """
+    starts = offsets[nodes].astype(np.int64)
+    lengths = offsets[nodes + 1].astype(np.int64) - starts
+    total = int(lengths.sum())
+    if total == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+
+    # Position of every slot: its row start plus its offset within the row
+    row_firsts = np.cumsum(lengths) - lengths
+    positions = np.repeat(starts - row_firsts, lengths) + np.arange(total)
+    return adjacency[positions].astype(np.int64), np.repeat(nodes, lengths)
+
+
+def as_array(buffer):
+    """
+    Wraps an array('I') or snapshot memoryview as a NumPy array
+    without copying it.
+    """
+    return np.frombuffer(buffer, dtype=np.uint32)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,493 @@
+"""
+Compact, integer-indexed representation of the degrees dataset
+"""
+
+import csv
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+
+
+class StringTable():
+    """
+    Sequence of strings packed into a single UTF-8 blob
+    and indexed by an array of byte offsets.
+
+    Strings appended after the table is built are kept in a plain list
+    after the packed ones; see CompactGraph.add_rows.
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+        self.base = len(offsets) - 1
+        self.extra = []
+        self.extra_positions = {}
+
+    @classmethod
+    def from_strings(cls, strings):
+        """
+        Pack an iterable of strings into a new table.
+        """
+        encoded = [string.encode("utf-8") for string in strings]
+        offsets = array("I", [0])
+        offsets.extend(accumulate(map(len, encoded)))
+        return cls(b"".join(encoded), offsets)
+
+    def __len__(self):
+        return self.base + len(self.extra)
+
+    def __getitem__(self, i):
+        if i >= self.base:
+            return self.extra[i - self.base]
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def index(self, string):
+        """
+        Returns the position of `string` in a table whose packed strings
+        are sorted, or None if it is not in the table.
+        """
+        i = bisect_left(self, string, 0, self.base)
+        if i < self.base and self[i] == string:
+            return i
+        return self.extra_positions.get(string)
+
+    def append(self, string):
+        """
+        Add a string after the packed ones and return its position.
+        """
+        self.extra_positions[string] = len(self)
+        self.extra.append(string)
+        return len(self) - 1
+
+
+class CompactGraph():
+    """
+    People and movies interned to dense integers, with the
+    person -> movie and movie -> person relations stored as
+    CSR (offset, target) arrays.
+
+    Person `p` starred in movies
+        person_movies[person_offsets[p]:person_offsets[p + 1]]
+    and movie `m` has stars
+        movie_people[movie_offsets[m]:movie_offsets[m + 1]]
+
+    IMDb ids are interned in sorted order, so looking an id up is
+    a binary search over `person_ids` / `movie_ids` rather than a dict.
+
+    Rows added after the graph is built (see add_rows) are kept in small
+    overlay dicts next to the CSR arrays until the next full build.
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies,
+                 movie_offsets, movie_people, name_order):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+        # Person indexes sorted by lowercase name
+        self.name_order = name_order
+
+        # Edges and names added by add_rows
+        self.extra_person_movies = {}
+        self.extra_movie_people = {}
+        self.extra_names = {}
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Build a graph from the people, movies and stars CSV files.
+        """
+        # Load people, later rows replacing earlier ones with the same id
+        people = {
+            person_id: (name, birth)
+            for person_id, name, birth
+            in read_columns(f"{directory}/people.csv", "id", "name", "birth")
+        }
+
+        # Load movies
+        movies = {
+            movie_id: (title, year)
+            for movie_id, title, year
+            in read_columns(f"{directory}/movies.csv", "id", "title", "year")
+        }
+
+        # Intern ids in sorted order
+        person_ids = sorted(people)
+        movie_ids = sorted(movies)
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+        # Load stars as parallel arrays of (person, movie) edges
+        sources = array("I")
+        targets = array("I")
+        for person_id, movie_id in read_columns(f"{directory}/stars.csv", "person_id", "movie_id"):
+            try:
+                person = person_index[person_id]
+                movie = movie_index[movie_id]
+            except KeyError:
+                continue
+            sources.append(person)
+            targets.append(movie)
+        del person_index, movie_index
+
+        # Build both directions of the adjacency
+        person_offsets, person_movies = build_csr(len(person_ids), sources, targets)
+        del sources, targets
+        person_offsets, person_movies = dedupe_csr(person_offsets, person_movies)
+        movie_offsets, movie_people = build_csr(
+            len(movie_ids), person_movies, expand_owners(person_offsets)
+        )
+
+        names = [people[person_id][0] for person_id in person_ids]
+        name_order = array("I", sorted(
+            range(len(names)), key=lambda i: names[i].lower()
+        ))
+
+        return cls(
+            StringTable.from_strings(person_ids),
+            StringTable.from_strings(names),
+            StringTable.from_strings(people[i][1] for i in person_ids),
+            StringTable.from_strings(movie_ids),
+            StringTable.from_strings(movies[i][0] for i in movie_ids),
+            StringTable.from_strings(movies[i][1] for i in movie_ids),
+            person_offsets, person_movies,
+            movie_offsets, movie_people, name_order
+        )
+
+    @property
+    def person_count(self):
+        return len(self.person_ids)
+
+    @property
+    def movie_count(self):
+        return len(self.movie_ids)
+
+    @property
+    def edge_count(self):
+        return len(self.person_movies) + sum(map(len, self.extra_person_movies.values()))
+
+    @property
+    def has_updates(self):
+        """
+        True if rows were added since the CSR arrays were built.
+        """
+        return bool(
+            self.person_ids.extra or self.movie_ids.extra or self.extra_person_movies
+        )
+
+    def add_rows(self, people=(), movies=(), stars=()):
+        """
+        Add people, movies and stars rows (dicts with the CSV columns)
+        to the graph without rebuilding the CSR arrays.
+
+        Rows for ids already in the graph, stars naming unknown ids
+        and stars already present are skipped. Returns the people,
+        movies and stars rows that were added.
+        """
+        added_people, added_movies, added_stars = [], [], []
+        for row in people:
+            if self.person_index(row["id"]) is not None:
+                continue
+            person = self.person_ids.append(row["id"])
+            self.person_names.append(row["name"])
+            self.person_births.append(row["birth"])
+            self.extra_names.setdefault(row["name"].lower(), []).append(person)
+            added_people.append(row)
+
+        for row in movies:
+            if self.movie_index(row["id"]) is not None:
+                continue
+            self.movie_ids.append(row["id"])
+            self.movie_titles.append(row["title"])
+            self.movie_years.append(row["year"])
+            added_movies.append(row)
+
+        for row in stars:
+            person = self.person_index(row["person_id"])
+            movie = self.movie_index(row["movie_id"])
+            if person is None or movie is None or movie in self.movies_for_person(person):
+                continue
+            self.extra_person_movies.setdefault(person, []).append(movie)
+            self.extra_movie_people.setdefault(movie, []).append(person)
+            added_stars.append(row)
+
+        return added_people, added_movies, added_stars
+
+    def person_index(self, person_id):
+        """
+        Returns the integer index of an IMDb person id, or None.
+        """
+        return self.person_ids.index(person_id)
+
+    def movie_index(self, movie_id):
+        """
+        Returns the integer index of an IMDb movie id, or None.
+        """
+        return self.movie_ids.index(movie_id)
+
+    def movies_for_person(self, person):
+        """
+        Returns the movie indexes a person index starred in.
+        """
+        movies = ()
+        if person < self.person_ids.base:
+            movies = self.person_movies[self.person_offsets[person]:self.person_offsets[person + 1]]
+        extra = self.extra_person_movies.get(person)
+        return [*movies, *extra] if extra else movies
+
+    def people_for_movie(self, movie):
+        """
+        Returns the person indexes that starred in a movie index.
+        """
+        people = ()
+        if movie < self.movie_ids.base:
+            people = self.movie_people[self.movie_offsets[movie]:self.movie_offsets[movie + 1]]
+        extra = self.extra_movie_people.get(movie)
+        return [*people, *extra] if extra else people
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for people
+        who starred with a given person index.
+        """
+        if self.extra_movie_people:
+            people_for_movie = self.people_for_movie
+        else:
+            # Fast path straight over the CSR arrays
+            movie_offsets = self.movie_offsets
+            movie_people = self.movie_people
+
+            def people_for_movie(movie):
+                return movie_people[movie_offsets[movie]:movie_offsets[movie + 1]]
+
+        for movie in self.movies_for_person(person):
+            for costar in people_for_movie(movie):
+                yield movie, costar
+
+    def person_ids_for_name(self, name):
+        """
+        Returns the IMDb ids of every person called `name`,
+        ignoring case.
+        """
+        key = name.lower()
+        order = self.name_order
+        names = self.person_names
+        i = bisect_left(order, key, key=lambda person: names[person].lower())
+        person_ids = []
+        while i < len(order) and names[order[i]].lower() == key:
+            person_ids.append(self.person_ids[order[i]])
+            i += 1
+        for person in self.extra_names.get(key, ()):
+            person_ids.append(self.person_ids[person])
+        return person_ids
+
+    def external_path(self, path):
+        """
+        Converts a path of (movie, person) indexes into
+        a path of (movie_id, person_id) IMDb ids.
+        """
+        if path is None:
+            return None
+        return [(self.movie_ids[movie], self.person_ids[person]) for movie, person in path]
+
+
+class Components():
+    """
+    Connected components of the person graph.
+
+    `labels` maps each person (an index into a CompactGraph, or an IMDb id
+    for the dict representation) to a component number, and `sizes[c]`
+    is the number of people in component `c`. Components merged into
+    another by join keep their number, with a size of 0.
+    """
+
+    def __init__(self, labels, sizes):
+        self.labels = labels
+        self.sizes = sizes
+
+    def connected(self, a, b):
+        """
+        Returns True if people `a` and `b` are in the same component.
+        """
+        return self.labels[a] == self.labels[b]
+
+    def size(self, person):
+        """
+        Returns the size of the component `person` belongs to.
+        """
+        return self.sizes[self.labels[person]]
+
+    def largest(self, n=10):
+        """
+        Returns (component, size) pairs for the `n` largest components.
+        """
+        return sorted(enumerate(self.sizes), key=lambda item: -item[1])[:n]
+
+    def add_person(self, person):
+        """
+        Put a new person in a component of their own. For a CompactGraph
+        `person` must be the next person index.
+        """
+        label = len(self.sizes)
+        self.sizes.append(1)
+        if isinstance(self.labels, dict):
+            self.labels[person] = label
+        else:
+            self.labels.append(label)
+
+    def join(self, group, neighbors):
+        """
+        Merge the components of everyone in `group`, e.g. a movie's cast
+        once new stars are added to it.
+
+        The smaller of each pair of components is relabelled by a search
+        from one of its people over `neighbors`, which yields (action,
+        person) pairs, so the work done depends on the components merged
+        rather than on the size of the graph.
+        """
+        first = None
+        for person in group:
+            if first is None:
+                first = person
+                continue
+            a, b = self.labels[first], self.labels[person]
+            if a == b:
+                continue
+            if self.sizes[a] < self.sizes[b]:
+                self.relabel(first, b, neighbors)
+            else:
+                self.relabel(person, a, neighbors)
+
+    def relabel(self, start, label, neighbors):
+        """
+        Move everyone in the component of `start` to component `label`.
+        """
+        old = self.labels[start]
+        self.labels[start] = label
+        stack = [start]
+        while stack:
+            person = stack.pop()
+            for _, other in neighbors(person):
+                if self.labels[other] == old:
+                    self.labels[other] = label
+                    stack.append(other)
+        self.sizes[label] += self.sizes[old]
+        self.sizes[old] = 0
+
+
+def find_components(count, groups):
+    """
+    Union-find over items 0 .. count - 1, joining all of the items
+    in each group (e.g. each movie's cast).
+
+    Returns (labels, sizes): a dense component number for every item
+    and the number of items in each component, components being
+    numbered in order of their lowest item.
+    """
+    parent = array("I", range(count))
+    rank = bytearray(count)
+
+    def find(item):
+        # Path halving
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    for group in groups:
+        root = None
+        for item in group:
+            if root is None:
+                root = find(item)
+                continue
+            other = find(item)
+            if other == root:
+                continue
+            # Union by rank
+            if rank[other] > rank[root]:
+                root, other = other, root
+            parent[other] = root
+            if rank[other] == rank[root]:
+                rank[root] += 1
+
+    labels = array("I", bytes(4 * count))
+    sizes = array("I")
+    numbers = {}
+    for item in range(count):
+        root = find(item)
+        if root not in numbers:
+            numbers[root] = len(sizes)
+            sizes.append(0)
+        labels[item] = numbers[root]
+        sizes[labels[item]] += 1
+    return labels, sizes
+
+
+def read_columns(path, *columns):
+    """
+    Yields tuples holding the given columns of every row in a CSV file.
+
+    Faster than csv.DictReader, which builds a dict per row.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        positions = [header.index(column) for column in columns]
+        for row in reader:
+            yield tuple(row[i] for i in positions)
+
+
+def build_csr(count, sources, targets):
+    """
+    Counting-sort parallel `sources`/`targets` arrays into
+    (offsets, adjacency) arrays indexed by source.
+    """
+    offsets = array("I", bytes(4 * (count + 1)))
+    for source in sources:
+        offsets[source + 1] += 1
+    for i in range(count):
+        offsets[i + 1] += offsets[i]
+
+    position = offsets[:-1]
+    adjacency = array("I", bytes(4 * len(sources)))
+    for source, target in zip(sources, targets):
+        adjacency[position[source]] = target
+        position[source] += 1
+
+    return offsets, adjacency
+
+
+def dedupe_csr(offsets, adjacency):
+    """
+    Sort every adjacency row and drop repeated targets,
+    e.g. from duplicate rows in stars.csv.
+    """
+    new_offsets = array("I", [0])
+    new_adjacency = array("I")
+    for i in range(len(offsets) - 1):
+        row = adjacency[offsets[i]:offsets[i + 1]]
+        if len(row) > 1:
+            row = array("I", sorted(set(row)))
+        new_adjacency.extend(row)
+        new_offsets.append(len(new_adjacency))
+    return new_offsets, new_adjacency
+
+
+def expand_owners(offsets):
+    """
+    Returns an array holding, for every adjacency slot,
+    the index of the row it belongs to.
+    """
+    owners = array("I")
+    for i in range(len(offsets) - 1):
+        owners.extend(array("I", [i]) * (offsets[i + 1] - offsets[i]))
+    return owners
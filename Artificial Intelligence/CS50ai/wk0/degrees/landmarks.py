@@ -0,0 +1,198 @@
+"""
+Landmark-based distance oracle for the degrees graph
+
+BFS distances from k high-degree landmark people bound the distance
+between any two people by the triangle inequality:
+
+    |d(L, s) - d(L, t)| <= d(s, t) <= d(L, s) + d(L, t)
+"""
+
+import math
+import random
+import sys
+import time
+
+import degrees
+
+# Distance stored for people a landmark cannot reach
+UNREACHABLE = 255
+# Distance stored for people this far or further from a landmark
+SATURATED = UNREACHABLE - 1
+
+
+class LandmarkIndex():
+    """
+    BFS distances from `k` landmarks to every person of a CompactGraph,
+    stored person-major in a single bytearray so the k distances of a
+    person are one contiguous slice.
+    """
+
+    def __init__(self, graph, k=16):
+        self.graph = graph
+        self.requested = k
+        self.build()
+
+    def build(self):
+        """
+        Choose the landmarks and compute their distances.
+        """
+        graph = self.graph
+        self.generation = degrees.generation
+        self.landmarks = choose_landmarks(graph, self.requested)
+        self.k = len(self.landmarks)
+        self.distances = bytearray([UNREACHABLE]) * (graph.person_count * self.k)
+        for i, landmark in enumerate(self.landmarks):
+            self.distances[i::self.k] = landmark_distances(graph, landmark)
+
+    @property
+    def nbytes(self):
+        return len(self.distances)
+
+    def row(self, person):
+        """
+        Returns the distances from every landmark to a person index.
+        """
+        return self.distances[person * self.k:(person + 1) * self.k]
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the distance between two
+        person indexes. `upper` is math.inf when no landmark reaches
+        both, and both are math.inf if the people cannot be connected.
+        """
+        # Added edges can shorten distances, so rebuild after updates
+        if self.generation != degrees.generation:
+            self.build()
+        return row_bounds(self.row(source), self.row(target))
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie, person) index pairs from
+        source to target, or None, using a bidirectional search that
+        drops people whose landmark bounds rule them out.
+        """
+        lower, upper = self.bounds(source, target)
+        if lower == math.inf:
+            degrees.reset_search_stats()
+            return None
+
+        source_row = self.row(source)
+        target_row = self.row(target)
+
+        def prune(person, depth, forward):
+            # A person at `depth` from one end lies on a shortest path
+            # only if depth + (distance to the other end) <= upper
+            other = target_row if forward else source_row
+            return depth + row_bounds(self.row(person), other)[0] > upper
+
+        return degrees.bidirectional_search(source, target, self.graph.neighbors, prune)
+
+
+def choose_landmarks(graph, k):
+    """
+    Returns the `k` people who starred in the most movies.
+    """
+    counts = [len(graph.movies_for_person(person)) for person in range(graph.person_count)]
+    order = sorted(range(graph.person_count), key=lambda person: -counts[person])
+    return order[:k]
+
+
+def landmark_distances(graph, landmark):
+    """
+    Returns a bytearray holding the BFS distance from `landmark` to every
+    person, capped at SATURATED, or UNREACHABLE if not connected.
+    """
+    distances = bytearray([UNREACHABLE]) * graph.person_count
+    seen_movies = bytearray(graph.movie_count)
+    distances[landmark] = 0
+    frontier = [landmark]
+    depth = 0
+
+    while frontier:
+        depth = min(depth + 1, SATURATED)
+        next_frontier = []
+        for person in frontier:
+            for movie in graph.movies_for_person(person):
+                # Each movie's cast only needs scanning once
+                if seen_movies[movie]:
+                    continue
+                seen_movies[movie] = 1
+                for costar in graph.people_for_movie(movie):
+                    if distances[costar] == UNREACHABLE:
+                        distances[costar] = depth
+                        next_frontier.append(costar)
+        frontier = next_frontier
+
+    return distances
+
+
+def row_bounds(a, b):
+    """
+    Returns (lower, upper) distance bounds from two rows of
+    landmark distances.
+
+    A SATURATED distance only says "at least SATURATED": |x - y| is
+    still a lower bound, but x + y is no upper bound.
+    """
+    lower = 0
+    upper = math.inf
+    for x, y in zip(a, b):
+        if x == UNREACHABLE and y == UNREACHABLE:
+            continue
+        if x == UNREACHABLE or y == UNREACHABLE:
+            # One is in the landmark's component, the other is not
+            return math.inf, math.inf
+        lower = max(lower, abs(x - y))
+        if x != SATURATED and y != SATURATED:
+            upper = min(upper, x + y)
+    return lower, upper
+
+
+def main():
+    if len(sys.argv) not in (2, 3, 4):
+        sys.exit("Usage: python landmarks.py directory [landmarks] [queries]")
+    directory = sys.argv[1]
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    queries = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    print("Loading data...")
+    degrees.load_data(directory, compact=True)
+    graph = degrees.graph
+
+    start = time.perf_counter()
+    index = LandmarkIndex(graph, k)
+    build = time.perf_counter() - start
+    print(f"Built {index.k} landmarks over {graph.person_count} people "
+          f"in {build:.2f}s, {index.nbytes} bytes.")
+
+    rng = random.Random(0)
+    pairs = [
+        (rng.randrange(graph.person_count), rng.randrange(graph.person_count))
+        for _ in range(queries)
+    ]
+
+    # Bounds only
+    start = time.perf_counter()
+    bounds = [index.bounds(source, target) for source, target in pairs]
+    elapsed = time.perf_counter() - start
+    exact = sum(1 for lower, upper in bounds if lower == upper)
+    print(f"bounds: {elapsed / queries * 1e6:.1f} us/query, "
+          f"{exact}/{queries} exact")
+
+    # Exact search with and without landmark pruning
+    for name, search in (
+        ("bidirectional", lambda s, t: degrees.bidirectional_search(s, t, graph.neighbors)),
+        ("landmark", index.shortest_path)
+    ):
+        expanded = 0
+        start = time.perf_counter()
+        for source, target in pairs:
+            search(source, target)
+            expanded += degrees.search_stats["expanded"]
+        elapsed = time.perf_counter() - start
+        print(f"{name}: {elapsed / queries * 1e3:.2f} ms/query, "
+              f"{expanded / queries:.0f} people expanded/query")
+
+
+if __name__ == "__main__":
+    main()
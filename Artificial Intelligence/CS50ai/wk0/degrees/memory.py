@@ -0,0 +1,48 @@
+"""
+Measure the memory taken by the dict and compact degrees representations
+"""
+
+import gc
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import degrees
+from synthetic import generate
+
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] in ("dict", "compact"):
+        measure(sys.argv[1], sys.argv[2])
+        return
+    if len(sys.argv) != 4:
+        sys.exit("Usage: python memory.py people movies stars")
+    people, movies, stars = (int(arg) for arg in sys.argv[1:])
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"Generating {people} people, {movies} movies, {stars} stars...")
+        generate(directory, people, movies, stars)
+        # Measure each representation in a fresh interpreter
+        for mode in ("dict", "compact"):
+            subprocess.run([sys.executable, __file__, mode, directory], check=True)
+
+
+def measure(mode, directory):
+    """
+    Load `directory` in the given mode and print the memory
+    still held once loading has finished.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    degrees.load_data(directory, compact=(mode == "compact"))
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    print(f"{mode:>8}: {current / 2 ** 20:8.1f} MiB resident, "
+          f"{peak / 2 ** 20:8.1f} MiB peak, loaded in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Prefix and typo-tolerant lookup of people's names
+"""
+
+from bisect import bisect_left
+
+import numpy as np
+
+from graph import StringTable
+
+# Characters padding a name before it is split into trigrams
+PAD = "\0"
+
+
+class NameIndex():
+    """
+    Sorted table of distinct lowercase names, for binary-search prefix
+    ranges, plus a trigram -> names inverted index for edit-distance
+    ("did you mean") lookups that never scan every name.
+    """
+
+    def __init__(self, names):
+        """
+        Build the index from an iterable of display names.
+        The first spelling seen of each lowercase name is kept for display.
+        """
+        spellings = {}
+        for name in names:
+            spellings.setdefault(name.lower(), name)
+        keys = sorted(spellings)
+        self.keys = StringTable.from_strings(keys)
+        self.display = StringTable.from_strings(spellings[key] for key in keys)
+
+        postings = {}
+        for position, key in enumerate(keys):
+            for trigram in trigrams(key):
+                postings.setdefault(trigram, []).append(position)
+        self.postings = {
+            trigram: np.array(positions, dtype=np.uint32)
+            for trigram, positions in postings.items()
+        }
+
+        # Trigram -> positions of names added after the index was built
+        self.extra_postings = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, names):
+        """
+        Add display names without rebuilding the index.
+
+        Their keys follow the sorted ones, as StringTable keeps appended
+        strings, and their trigrams go into small overlay posting lists.
+        Names whose lowercase form is already indexed are skipped.
+        """
+        for name in names:
+            key = name.lower()
+            if self.keys.index(key) is not None:
+                continue
+            position = self.keys.append(key)
+            self.display.append(name)
+            for trigram in trigrams(key):
+                self.extra_postings.setdefault(trigram, []).append(position)
+
+    def complete(self, prefix, limit=10):
+        """
+        Returns up to `limit` names starting with `prefix`,
+        ignoring case, in alphabetical order.
+        """
+        prefix = prefix.lower()
+        keys = self.keys
+        i = bisect_left(keys, prefix, 0, keys.base)
+        matches = []
+        while i < keys.base and len(matches) < limit:
+            if not keys[i].startswith(prefix):
+                break
+            matches.append((keys[i], self.display[i]))
+            i += 1
+
+        # Added names are not sorted, so check each of them
+        matches.extend(
+            (key, display) for key, display in zip(keys.extra, self.display.extra)
+            if key.startswith(prefix)
+        )
+        return [display for _, display in sorted(matches)[:limit]]
+
+    def count_prefix(self, prefix):
+        """
+        Returns the number of names starting with `prefix`.
+        """
+        prefix = prefix.lower()
+        keys = self.keys
+        lo = bisect_left(keys, prefix, 0, keys.base)
+        hi = bisect_left(keys, prefix + "\U0010ffff", lo, keys.base)
+        return hi - lo + sum(key.startswith(prefix) for key in keys.extra)
+
+    def suggest(self, name, max_distance=2, limit=5):
+        """
+        Returns up to `limit` (name, distance) pairs for names within
+        `max_distance` edits of `name`, closest first.
+        """
+        query = name.lower()
+        grams = set(trigrams(query))
+        lists = [self.postings[gram] for gram in grams if gram in self.postings]
+        lists.extend(
+            np.array(self.extra_postings[gram], dtype=np.uint32)
+            for gram in grams if gram in self.extra_postings
+        )
+        if not lists:
+            return []
+
+        # Count the query trigrams shared by each name in the posting
+        # lists, without a Python loop or touching any other name
+        positions, shared = np.unique(np.concatenate(lists), return_counts=True)
+
+        # An edit touches at most 3 trigrams, so a name within d edits
+        # shares all but 3d of the query's trigrams.
+        # Widen d only while too few names are found
+        max_distance = min(max_distance, (len(grams) - 1) // 3)
+        distances = {}
+        for distance in range(max_distance + 1):
+            survivors = positions[shared >= len(grams) - 3 * distance]
+            for position in survivors.tolist():
+                if position not in distances:
+                    distances[position] = edit_distance(
+                        query, self.keys[position], max_distance
+                    )
+            matches = sorted(
+                (found, self.keys[position], self.display[position])
+                for position, found in distances.items()
+                if found is not None and found <= distance
+            )
+            if len(matches) >= limit:
+                break
+
+        return [(display, found) for found, _, display in matches[:limit]]
+
+
+def trigrams(name):
+    """
+    Returns the trigrams of a name padded at both ends.
+    """
+    padded = PAD * 2 + name + PAD
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def edit_distance(a, b, limit):
+    """
+    Returns the Levenshtein distance between two strings,
+    or None if it is greater than `limit`.
+
+    Only cells within `limit` of the diagonal are computed.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return None
+    beyond = limit + 1
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        x = a[i - 1]
+        lo = max(1, i - limit)
+        hi = min(len(b), i + limit)
+        current = [beyond] * (len(b) + 1)
+        current[0] = i if i <= limit else beyond
+        best = current[0]
+        for j in range(lo, hi + 1):
+            cost = previous[j - 1] + (x != b[j - 1])
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            current[j] = cost
+            if cost < best:
+                best = cost
+        # Every later row is at least this row's minimum
+        if best > limit:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= limit else None
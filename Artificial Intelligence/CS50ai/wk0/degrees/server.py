@@ -0,0 +1,293 @@
+"""
+Long-running HTTP server answering degrees queries from a graph loaded once
+
+Endpoints (all GET, all return JSON):
+    /path?source=ID&target=ID    shortest path between two person ids
+    /person?name=NAME            person ids matching a name
+    /complete?prefix=TEXT        names starting with a prefix
+    /suggest?name=NAME           names within a few typos of a name
+    /stats                       cache counters and latency histograms
+"""
+
+import argparse
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import degrees
+
+# Upper edges of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS = [0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000]
+
+
+class BadParameter(ValueError):
+    """
+    A query parameter present but not usable, answered with a 400.
+    """
+    pass
+
+
+class PathCache():
+    """
+    Thread-safe LRU of shortest paths keyed by the unordered pair of
+    people, so (a, b) and (b, a) share an entry.
+
+    The cache empties itself once degrees.apply_updates has changed
+    the graph its paths were computed on.
+    """
+
+    def __init__(self, capacity=10000):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.generation = degrees.generation
+
+    def get(self, source, target):
+        """
+        Returns (True, path) from source to target if cached,
+        otherwise (False, None).
+        """
+        key = pair_key(source, target)
+        with self.lock:
+            self.drop_stale()
+            if key not in self.entries:
+                self.misses += 1
+                return False, None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            path = self.entries[key]
+        # Entries are stored from the lower id to the higher one
+        if path is not None and source != key[0]:
+            path = reverse_path(key[0], path)
+        return True, path
+
+    def put(self, source, target, path):
+        """
+        Store the path from source to target, evicting the least
+        recently used entry if the cache is full.
+        """
+        key = pair_key(source, target)
+        if path is not None and source != key[0]:
+            path = reverse_path(source, path)
+        with self.lock:
+            self.drop_stale()
+            self.entries[key] = path
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def drop_stale(self):
+        # Called with the lock held
+        if self.generation != degrees.generation:
+            self.entries.clear()
+            self.generation = degrees.generation
+
+    def stats(self):
+        with self.lock:
+            return {
+                "size": len(self.entries),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+class LatencyHistogram():
+    """
+    Thread-safe count of request latencies per endpoint,
+    bucketed by LATENCY_BUCKETS.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def record(self, endpoint, milliseconds):
+        bucket = bisect_left(LATENCY_BUCKETS, milliseconds)
+        with self.lock:
+            counts = self.counts.setdefault(endpoint, [0] * (len(LATENCY_BUCKETS) + 1))
+            counts[bucket] += 1
+
+    def stats(self):
+        labels = [f"<={edge}ms" for edge in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}ms"]
+        with self.lock:
+            return {
+                endpoint: dict(zip(labels, counts))
+                for endpoint, counts in self.counts.items()
+            }
+
+
+class DegreesServer(ThreadingHTTPServer):
+    """
+    HTTP server holding the shared cache and histograms.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, cache_size=10000, bidirectional=True):
+        super().__init__(address, DegreesHandler)
+        self.cache = PathCache(cache_size)
+        self.latency = LatencyHistogram()
+        self.bidirectional = bidirectional
+
+
+class DegreesHandler(BaseHTTPRequestHandler):
+    """
+    Routes GET requests to the query endpoints.
+    """
+
+    def do_GET(self):
+        start = time.perf_counter()
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        routes = {
+            "/path": self.path_endpoint,
+            "/person": self.person_endpoint,
+            "/complete": self.complete_endpoint,
+            "/suggest": self.suggest_endpoint,
+            "/stats": self.stats_endpoint
+        }
+        if url.path not in routes:
+            self.send_json(404, {"error": f"unknown endpoint {url.path}"})
+            return
+        try:
+            status, body = routes[url.path](query)
+        except KeyError as error:
+            status, body = 400, {"error": f"missing parameter {error}"}
+        except BadParameter as error:
+            status, body = 400, {"error": str(error)}
+        self.send_json(status, body)
+        self.server.latency.record(url.path, (time.perf_counter() - start) * 1000)
+
+    def path_endpoint(self, query):
+        source, target = query["source"], query["target"]
+        for person_id in (source, target):
+            if degrees.graph.person_index(person_id) is None:
+                return 404, {"error": f"unknown person {person_id}"}
+
+        cached, path = self.server.cache.get(source, target)
+        if not cached:
+            path = degrees.shortest_path(source, target, self.server.bidirectional)
+            self.server.cache.put(source, target, path)
+
+        return 200, {
+            "source": source,
+            "target": target,
+            "degrees": None if path is None else len(path),
+            "path": path,
+            "cached": cached
+        }
+
+    def person_endpoint(self, query):
+        name = query["name"]
+        return 200, {
+            "name": name,
+            "people": [
+                {
+                    "id": person_id,
+                    "name": degrees.person_name(person_id),
+                    "birth": degrees.person_birth(person_id)
+                }
+                for person_id in degrees.person_ids_for_name(name)
+            ]
+        }
+
+    def complete_endpoint(self, query):
+        prefix = query["prefix"]
+        limit = count_parameter(query, "limit", 10)
+        return 200, {"prefix": prefix, "names": degrees.complete_name(prefix, limit)}
+
+    def suggest_endpoint(self, query):
+        name = query["name"]
+        limit = count_parameter(query, "limit", 5)
+        return 200, {"name": name, "names": degrees.suggest_names(name, limit)}
+
+    def stats_endpoint(self, query):
+        return 200, {
+            "cache": self.server.cache.stats(),
+            "latency": self.server.latency.stats()
+        }
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Keep the terminal quiet; /stats has the numbers
+        pass
+
+
+def count_parameter(query, key, default):
+    """
+    Returns a query parameter as a non-negative integer, or `default` if
+    it is missing. Raises BadParameter if it is not one.
+    """
+    if key not in query:
+        return default
+    try:
+        value = int(query[key])
+    except ValueError:
+        raise BadParameter(f"parameter '{key}' must be an integer")
+    if value < 0:
+        raise BadParameter(f"parameter '{key}' must not be negative")
+    return value
+
+
+def pair_key(a, b):
+    return (a, b) if a <= b else (b, a)
+
+
+def reverse_path(source, path):
+    """
+    Returns the path from the end of `path` back to `source`,
+    in the same (movie_id, person_id) format.
+    """
+    people = [source] + [person for _, person in path]
+    movies = [movie for movie, _ in path]
+    return [
+        (movies[i], people[i])
+        for i in range(len(movies) - 1, -1, -1)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve degrees queries over HTTP.")
+    parser.add_argument("directory", help="data directory (CSVs or snapshot)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--cache-size", type=int, default=10000)
+    parser.add_argument("--unidirectional", action="store_true")
+    args = parser.parse_args()
+
+    print("Loading data...")
+    degrees.load_data(args.directory, compact=True, components=True, name_index=True)
+    print("Data loaded.")
+
+    server = DegreesServer(
+        (args.host, args.port), args.cache_size, not args.unidirectional
+    )
+    print(f"Serving on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Versioned, memory-mappable binary snapshots of a CompactGraph
+
+Layout (native byte order, every section aligned to 8 bytes):
+
+    header     magic, version, byte order, item size, section count
+    sections   (offset, length) pair for each section
+    data       string table blobs and offsets, then adjacency arrays
+
+Opening a snapshot maps the file and wraps each section in a memoryview,
+so nothing is parsed or copied until it is actually read.
+
+Rows appended to the CSVs afterwards through degrees.apply_updates are
+recorded in a JSON lines journal next to the snapshot and replayed on top
+of it when it is opened, until the snapshot is next compiled.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from graph import CompactGraph, StringTable
+
+FILENAME = "degrees.snapshot"
+JOURNAL = "degrees.snapshot.journal"
+MAGIC = b"DEGREES\0"
+VERSION = 1
+
+HEADER = struct.Struct("<8sIIII")
+SECTION = struct.Struct("<QQ")
+ALIGNMENT = 8
+
+CSV_FILES = ["people.csv", "movies.csv", "stars.csv"]
+
+STRING_TABLES = [
+    "person_ids", "person_names", "person_births",
+    "movie_ids", "movie_titles", "movie_years"
+]
+
+ARRAYS = [
+    "person_offsets", "person_movies",
+    "movie_offsets", "movie_people", "name_order"
+]
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python snapshot.py directory")
+    directory = sys.argv[1]
+
+    print("Loading data...")
+    graph = CompactGraph.from_csv(directory)
+    path = snapshot_path(directory)
+    write_snapshot(graph, path)
+    # The new snapshot already holds every journaled row
+    remove_journal(directory)
+    print(f"Wrote {path} ({os.path.getsize(path)} bytes).")
+
+
+def snapshot_path(directory):
+    """
+    Returns the path of the snapshot for a data directory.
+    """
+    return os.path.join(directory, FILENAME)
+
+
+def journal_path(directory):
+    """
+    Returns the path of the update journal for a data directory.
+    """
+    return os.path.join(directory, JOURNAL)
+
+
+def is_fresh(directory):
+    """
+    Returns True if the directory has a snapshot that, together with
+    its journal, is newer than all of its CSV files.
+    """
+    path = snapshot_path(directory)
+    if not os.path.exists(path):
+        return False
+    modified = os.path.getmtime(path)
+    if os.path.exists(journal_path(directory)):
+        modified = max(modified, os.path.getmtime(journal_path(directory)))
+    return all(
+        os.path.getmtime(os.path.join(directory, name)) <= modified
+        for name in CSV_FILES
+        if os.path.exists(os.path.join(directory, name))
+    )
+
+
+def write_snapshot(graph, path):
+    """
+    Write a graph to `path`, replacing any existing snapshot atomically.
+    """
+    if graph.has_updates:
+        raise ValueError("graph has rows added since it was built; compile it from the CSVs")
+
+    sections = []
+    for name in STRING_TABLES:
+        table = getattr(graph, name)
+        sections.append(table.blob)
+        sections.append(table.offsets)
+    for name in ARRAYS:
+        sections.append(getattr(graph, name))
+
+    # Lay the sections out after the header and section table
+    position = align(HEADER.size + SECTION.size * len(sections))
+    table = []
+    for section in sections:
+        length = memoryview(section).nbytes
+        table.append((position, length))
+        position = align(position + length)
+
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(
+            MAGIC, VERSION, byteorder_flag(), array("I").itemsize, len(sections)
+        ))
+        for offset, length in table:
+            f.write(SECTION.pack(offset, length))
+        for section, (offset, length) in zip(sections, table):
+            f.write(bytes(offset - f.tell()))
+            f.write(section)
+    os.replace(temporary, path)
+
+
+def open_snapshot(path):
+    """
+    Map a snapshot into memory and return it as a CompactGraph.
+
+    Raises ValueError if the file is not a snapshot this version can read.
+    """
+    with open(path, "rb") as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    view = memoryview(mapping)
+    if len(view) < HEADER.size:
+        raise ValueError(f"{path} is not a degrees snapshot")
+    magic, version, byteorder, itemsize, count = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a degrees snapshot")
+    if version != VERSION:
+        raise ValueError(f"{path} is snapshot version {version}, expected {VERSION}")
+    if byteorder != byteorder_flag() or itemsize != array("I").itemsize:
+        raise ValueError(f"{path} was written on an incompatible platform")
+    if count != 2 * len(STRING_TABLES) + len(ARRAYS):
+        raise ValueError(f"{path} has {count} sections")
+
+    sections = []
+    for i in range(count):
+        offset, length = SECTION.unpack_from(view, HEADER.size + i * SECTION.size)
+        if offset + length > len(view):
+            raise ValueError(f"{path} is truncated")
+        sections.append(view[offset:offset + length])
+
+    fields = {}
+    for i, name in enumerate(STRING_TABLES):
+        fields[name] = StringTable(sections[2 * i], sections[2 * i + 1].cast("I"))
+    for i, name in enumerate(ARRAYS):
+        fields[name] = sections[2 * len(STRING_TABLES) + i].cast("I")
+    return CompactGraph(**fields)
+
+
+def append_journal(directory, people, movies, stars):
+    """
+    Record rows added to the CSVs so the snapshot stays usable.
+    """
+    entry = {"people": people, "movies": movies, "stars": stars}
+    with open(journal_path(directory), "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+def replay_journal(directory, graph):
+    """
+    Apply every journaled update to a graph opened from the snapshot.
+    """
+    if not os.path.exists(journal_path(directory)):
+        return
+    with open(journal_path(directory), encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            graph.add_rows(entry["people"], entry["movies"], entry["stars"])
+
+
+def remove_journal(directory):
+    if os.path.exists(journal_path(directory)):
+        os.remove(journal_path(directory))
+
+
+def align(position):
+    return -(-position // ALIGNMENT) * ALIGNMENT
+
+
+def byteorder_flag():
+    return 0 if sys.byteorder == "little" else 1
+
+
+if __name__ == "__main__":
+    main()
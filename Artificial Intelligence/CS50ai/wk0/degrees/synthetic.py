@@ -0,0 +1,135 @@
+"""
+Generate synthetic people/movies/stars CSV datasets for degrees
+
+By default cast sizes and how often each person is cast both follow
+power laws, as in the real IMDb data: most movies have a handful of
+stars, a few have hundreds, and a small number of prolific actors
+account for a large share of all credits.
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+FIRST_NAMES = [
+    "Anna", "Ben", "Carla", "David", "Elena", "Frank", "Grace", "Hugo",
+    "Irene", "James", "Kate", "Leo", "Maria", "Nick", "Olivia", "Paul",
+    "Quinn", "Rosa", "Sam", "Tina", "Victor", "Wendy", "Xavier", "Yara", "Zoe"
+]
+
+LAST_NAMES = [
+    "Adams", "Baker", "Clark", "Diaz", "Evans", "Flores", "Garcia", "Hill",
+    "Ito", "Jones", "King", "Lopez", "Moore", "Nguyen", "Ortiz", "Perez",
+    "Reed", "Smith", "Turner", "Usman", "Vega", "Walker", "Young", "Zhang"
+]
+
+# Exponent of the Zipf distribution of cast sizes
+CAST_EXPONENT = 2.0
+MAX_CAST = 500
+
+# Exponent of the rank-frequency law of how often people are cast
+POPULARITY_EXPONENT = 0.8
+
+# Rows written per batch
+CHUNK = 1 << 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic degrees dataset.")
+    parser.add_argument("directory")
+    parser.add_argument("people", type=int)
+    parser.add_argument("movies", type=int)
+    parser.add_argument("stars", type=int, help="approximate number of star rows")
+    parser.add_argument("--uniform", action="store_true",
+                        help="spread stars uniformly instead of by power laws")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate(args.directory, args.people, args.movies, args.stars, args.seed, args.uniform)
+
+
+def generate(directory, people, movies, stars, seed=0, uniform=False):
+    """
+    Write people.csv, movies.csv and stars.csv to `directory`
+    with `people` people, `movies` movies and roughly `stars`
+    (person, movie) rows. The same arguments always produce
+    the same files.
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    # People
+    first = rng.integers(len(FIRST_NAMES), size=people)
+    last = rng.integers(len(LAST_NAMES), size=people)
+    births = rng.integers(1900, 2011, size=people)
+    write_rows(
+        os.path.join(directory, "people.csv"), "id,name,birth", people,
+        lambda i: f"{person_id(i)},{FIRST_NAMES[first[i]]} {LAST_NAMES[last[i]]} {i % 9973},{births[i]}"
+    )
+
+    # Movies
+    years = rng.integers(1920, 2024, size=movies)
+    write_rows(
+        os.path.join(directory, "movies.csv"), "id,title,year", movies,
+        lambda i: f"{movie_id(i)},Movie {i},{years[i]}"
+    )
+
+    # Stars
+    if uniform:
+        star_people = rng.integers(people, size=stars)
+        star_movies = rng.integers(movies, size=stars)
+    else:
+        star_movies = np.repeat(np.arange(movies), cast_sizes(rng, movies, stars))
+        star_people = cast_people(rng, people, len(star_movies))
+    write_rows(
+        os.path.join(directory, "stars.csv"), "person_id,movie_id", len(star_movies),
+        lambda i: f"{person_id(star_people[i])},{movie_id(star_movies[i])}"
+    )
+
+
+def cast_sizes(rng, movies, stars):
+    """
+    Returns a Zipf-distributed cast size for every movie,
+    scaled so that they add up to about `stars`.
+    """
+    sizes = np.minimum(rng.zipf(CAST_EXPONENT, size=movies), MAX_CAST).astype(np.float64)
+    sizes *= stars / sizes.sum()
+    return np.maximum(1, np.rint(sizes)).astype(np.int64)
+
+
+def cast_people(rng, people, count):
+    """
+    Returns `count` people, in random order, in which everyone appears
+    at least once (if there are enough rows) and the remaining rows are
+    drawn with probability falling off as a power of each person's
+    (randomly assigned) popularity rank.
+    """
+    weights = 1 / np.arange(1, people + 1) ** POPULARITY_EXPONENT
+    weights /= weights.sum()
+    ranks = rng.permutation(people)
+    everyone = np.arange(min(people, count))
+    popular = ranks[rng.choice(people, size=count - len(everyone), p=weights)]
+    return rng.permutation(np.concatenate([everyone, popular]))
+
+
+def write_rows(path, header, count, row):
+    """
+    Write `count` lines produced by `row(i)` under a header, in chunks.
+    """
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(header + "\n")
+        for start in range(0, count, CHUNK):
+            f.write("\n".join(row(i) for i in range(start, min(count, start + CHUNK))))
+            f.write("\n")
+
+
+def person_id(i):
+    return str(100000 + i)
+
+
+def movie_id(i):
+    return str(5000000 + i)
+
+
+if __name__ == "__main__":
+    main()
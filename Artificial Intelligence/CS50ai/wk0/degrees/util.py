@@ -1,38 +1,146 @@
+import heapq
+from collections import deque
+from itertools import count
+
+
 class Node():
-    def __init__(self, state, parent, action):
+    def __init__(self, state, parent, action, cost=0):
         self.state = state
         self.parent = parent
         self.action = action
+        self.cost = cost
 
 
 class StackFrontier():
+    """
+    Last in, first out frontier.
+
+    The states held are kept in a set, so adding, removing and
+    contains_state all take constant time. Adding a node whose state is
+    already in the frontier is rejected and counted as a duplicate.
+    """
+
     def __init__(self):
-        self.frontier = []
-        
+        self.frontier = deque()
+        self.states = set()
+        self.pushes = 0
+        self.pops = 0
+        self.peak_size = 0
+        self.duplicates = 0
+
     def add(self, node):
+        """
+        Add a node, returning False if its state was already in the frontier.
+        """
+        if node.state in self.states:
+            self.duplicates += 1
+            return False
         self.frontier.append(node)
-        
+        self.states.add(node.state)
+        self.pushes += 1
+        if len(self.frontier) > self.peak_size:
+            self.peak_size = len(self.frontier)
+        return True
+
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
-    def empty(self):            
+    def empty(self):
         return len(self.frontier) == 0
 
+    def __len__(self):
+        return len(self.frontier)
+
     def remove(self):
         if self.empty():
             raise Exception("empty frontier")
-        else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
-            return node
+        node = self.take()
+        self.states.discard(node.state)
+        self.pops += 1
+        return node
+
+    def take(self):
+        return self.frontier.pop()
+
+    def stats(self):
+        return {
+            "pushes": self.pushes,
+            "pops": self.pops,
+            "peak_size": self.peak_size,
+            "duplicates": self.duplicates
+        }
 
 
 class QueueFrontier(StackFrontier):
+    """
+    First in, first out frontier.
+    """
+
+    def take(self):
+        return self.frontier.popleft()
+
+
+class PriorityFrontier(StackFrontier):
+    """
+    Frontier that removes the node with the lowest priority first,
+    for uniform-cost search (priority = node.cost) and A*
+    (priority = node.cost + heuristic). Ties go to the node added first.
+
+    Adding a state already in the frontier replaces it if the new
+    priority is lower and is otherwise rejected as a duplicate.
+    Replaced entries stay in the heap and are skipped when reached.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.frontier = []
+        # Maps each state held to its current heap entry
+        self.entries = {}
+        self.order = count()
+
+    def add(self, node, priority=None):
+        """
+        Add a node, returning False if its state was already
+        in the frontier with a priority at least as low.
+        """
+        if priority is None:
+            priority = node.cost
+        current = self.entries.get(node.state)
+        if current is not None and current[0] <= priority:
+            self.duplicates += 1
+            return False
+        entry = (priority, next(self.order), node)
+        self.entries[node.state] = entry
+        heapq.heappush(self.frontier, entry)
+        self.pushes += 1
+        if len(self.entries) > self.peak_size:
+            self.peak_size = len(self.entries)
+        return True
+
+    def contains_state(self, state):
+        return state in self.entries
+
+    def priority(self, state):
+        """
+        Returns the priority a state is held at, or None if it is not held.
+        """
+        entry = self.entries.get(state)
+        return None if entry is None else entry[0]
+
+    def empty(self):
+        return len(self.entries) == 0
+
+    def __len__(self):
+        return len(self.entries)
 
     def remove(self):
         if self.empty():
             raise Exception("empty frontier")
-        else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
-            return node
+        while True:
+            entry = heapq.heappop(self.frontier)
+            node = entry[2]
+            # Skip entries replaced by a lower priority
+            if self.entries.get(node.state) is entry:
+                del self.entries[node.state]
+                self.pops += 1
+                return node
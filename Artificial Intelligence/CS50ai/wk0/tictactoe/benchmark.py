@@ -0,0 +1,221 @@
+"""
+Benchmark the tic-tac-toe engines from a fixed set of positions
+
+Every engine is run on every position it can play, each time starting
+from empty transposition tables (and, for minimax, without the opening
+book), and its move is checked against the others:
+
+    - on 3x3 boards, a move agrees if it keeps the exact value of the
+      position, as solved by bitboard.negamax
+    - on larger boards, searched to a fixed depth, mnk and parallel
+      agree if they find the same value, and mcts if it plays mnk's move
+
+mcts is not exact, so its disagreements are reported but do not count
+as failures; for it, "nodes" counts playouts. Results are printed (and
+optionally written) as JSON:
+
+    {
+        "depth": ..., "iterations": ..., "workers": ...,
+        "positions": [
+            {
+                "name": "center", "rows": 3, "columns": 3, "k": 3, "board": "...",
+                "runs": [
+                    {"engine": "minimax", "move": [0, 0], "nodes": ...,
+                     "seconds": ..., "nodes_per_second": ..., "agrees": true},
+                    ...
+                ]
+            },
+            ...
+        ],
+        "disagreements": [{"position": ..., "engine": ...}, ...]
+    }
+
+Exits with status 1 if an exact engine disagrees.
+
+Usage: python benchmark.py [--engines minimax,bitboard,...] [--depth 4]
+    [--iterations 2000] [--workers 2] [--output FILE]
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+
+import bitboard
+import mcts
+import mnk
+import parallel
+import tictactoe
+from tictactoe import X, O, EMPTY
+
+ENGINES = ["minimax", "bitboard", "mnk", "parallel", "mcts"]
+
+# Engines able to play boards other than 3x3 with k = 3 to a fixed depth
+LARGE_ENGINES = ["mnk", "parallel", "mcts"]
+
+# Engines whose moves need not agree
+HEURISTIC_ENGINES = ["mcts"]
+
+# (name, k, board) with rows separated by "/" and "." for an empty cell
+POSITIONS = [
+    ("empty", 3, ".../.../..."),
+    ("center", 3, ".../.X./..."),
+    ("corner", 3, "X../.../..."),
+    ("edge", 3, ".X./.../..."),
+    ("fork", 3, "X../.O./..X"),
+    ("block", 3, "XX./.O./..."),
+    ("win", 3, "XX./OO./..."),
+    ("4x4 center", 3, "..../.X../..../...."),
+    ("7x7 center", 4, "......./......./......./...X.../......./......./......."),
+    ("7x7 open three", 4, "......./......./..O..../..XXX../....O../......./......."),
+    ("15x15 center", 5, "/".join(["." * 15] * 7 + ["." * 7 + "X" + "." * 7] + ["." * 15] * 7)),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the tic-tac-toe engines.")
+    parser.add_argument("--engines", default=",".join(ENGINES),
+                        help="comma-separated subset of " + ",".join(ENGINES))
+    parser.add_argument("--depth", type=int, default=4,
+                        help="search depth on boards other than 3x3")
+    parser.add_argument("--iterations", type=int, default=2000,
+                        help="mcts iterations per move")
+    parser.add_argument("--workers", type=int, default=2, help="processes for parallel")
+    parser.add_argument("--output", help="also write the JSON to this file")
+    args = parser.parse_args()
+
+    engines = args.engines.split(",")
+    for engine in engines:
+        if engine not in ENGINES:
+            sys.exit(f"Unknown engine: {engine}")
+
+    # Always search rather than look moves up
+    tictactoe.opening_book = None
+
+    positions = []
+    disagreements = []
+    for name, k, text in POSITIONS:
+        board = parse(text)
+        small = len(board) == 3 and len(board[0]) == 3 and k == 3
+        runs = []
+        for engine in engines:
+            if small or engine in LARGE_ENGINES:
+                runs.append(run(engine, board, k, args))
+        check(board, k, small, runs)
+        for entry in runs:
+            if not entry["agrees"] and entry["engine"] not in HEURISTIC_ENGINES:
+                disagreements.append({"position": name, "engine": entry["engine"]})
+        positions.append({
+            "name": name, "rows": len(board), "columns": len(board[0]), "k": k,
+            "board": text, "runs": runs
+        })
+
+    output = json.dumps({
+        "depth": args.depth, "iterations": args.iterations, "workers": args.workers,
+        "positions": positions, "disagreements": disagreements
+    }, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    if disagreements:
+        sys.exit(1)
+
+
+def parse(text):
+    """
+    Returns the board written as rows separated by "/".
+    """
+    marks = {"X": X, "O": O, ".": EMPTY}
+    return [[marks[mark] for mark in row] for row in text.split("/")]
+
+
+def run(engine, board, k, args):
+    """
+    Returns the move, nodes and time of one engine on a board,
+    starting from empty tables.
+    """
+    game = mnk.game_for(len(board), len(board[0]), k)
+    game.transpositions.clear()
+    tictactoe.transpositions.clear()
+    bitboard.transpositions.clear()
+    mcts.tree = None
+
+    start = time.perf_counter()
+    if engine == "minimax":
+        move = tictactoe.minimax(board)
+        nodes = tictactoe.search_stats["nodes"]
+    elif engine == "bitboard":
+        move = bitboard.minimax(board)
+        nodes = bitboard.search_stats["nodes"]
+    elif engine == "mnk":
+        move = mnk.best_move(board, k, math.inf, max_depth(board, k, args))
+        nodes = mnk.search_stats["nodes"]
+    elif engine == "parallel":
+        move = parallel.best_move(board, k, math.inf, args.workers, max_depth(board, k, args))
+        nodes = parallel.search_stats["nodes"]
+    else:
+        move = mcts.best_move(board, k, iterations=args.iterations)
+        nodes = mcts.search_stats["playouts"]
+    seconds = time.perf_counter() - start
+
+    entry = {
+        "engine": engine,
+        "move": list(move),
+        "nodes": nodes,
+        "seconds": round(seconds, 6),
+        "nodes_per_second": round(nodes / seconds) if seconds else 0
+    }
+    if engine in ("mnk", "parallel"):
+        # Kept for check(), which compares the values found
+        entry["value"] = (mnk if engine == "mnk" else parallel).search_stats["value"]
+    return entry
+
+
+def max_depth(board, k, args):
+    """
+    Returns the depth limit: none on 3x3 boards, which are solved.
+    """
+    if len(board) == 3 and len(board[0]) == 3 and k == 3:
+        return None
+    return args.depth
+
+
+def check(board, k, small, runs):
+    """
+    Sets "agrees" on each run, as described at the top of this file.
+    """
+    if small:
+        x, o = bitboard.from_board(board)
+        mover, other = (x, o) if bitboard.player(x, o) == X else (o, x)
+        best = bitboard.negamax(mover, other, -2, 2)[0]
+        for entry in runs:
+            entry["agrees"] = move_value(mover, other, entry["move"]) == best
+        return
+
+    reference = next((entry for entry in runs if entry["engine"] == "mnk"), None)
+    for entry in runs:
+        if reference is None:
+            entry["agrees"] = True
+        elif entry["engine"] == "mcts":
+            entry["agrees"] = entry["move"] == reference["move"]
+        else:
+            entry["agrees"] = entry["value"] == reference["value"]
+
+
+def move_value(mover, other, move):
+    """
+    Returns the exact value for `mover` of playing `move` on a 3x3 board.
+    """
+    cell = bitboard.to_cell(tuple(move))
+    mine = mover | 1 << cell
+    if bitboard.has_line(mine):
+        return 1
+    if mine | other == bitboard.FULL:
+        return 0
+    return -bitboard.negamax(other, mine, -2, 2)[0]
+
+
+if __name__ == "__main__":
+    main()
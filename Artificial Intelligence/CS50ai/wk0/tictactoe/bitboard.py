@@ -0,0 +1,165 @@
+"""
+Tic Tac Toe engine on bitboards
+
+A position is a pair of integers, one bitmask of occupied cells per
+player, where cell (i, j) is bit 3 * i + j. Playing a move is a single
+OR and a win is a line mask fully covered by one player's bits, so
+nothing is copied or scanned while searching.
+
+`minimax` takes and returns the same board and (i, j) actions as
+tictactoe.minimax, so runner.py can use either engine.
+"""
+
+import mnk
+from symmetry import symmetry_for
+from table import bound_kind, decides
+from tictactoe import X, O
+
+SIZE = 3
+CELLS = SIZE * SIZE
+FULL = (1 << CELLS) - 1
+
+# Line masks and board conversion are those of the m,n,k engine's 3x3 game
+GAME = mnk.game_for(SIZE, SIZE, 3)
+LINES = GAME.lines
+# Lines through each cell, so a move only checks the lines it can complete
+CELL_LINES = GAME.cell_lines
+from_board = GAME.from_board
+to_board = GAME.to_board
+has_line = GAME.has_line
+
+# Cells tried first by the search: center, then corners, then edges
+MOVE_ORDER = [4, 0, 2, 6, 8, 1, 3, 5, 7]
+
+# Maps canonical (mover, other) masks to (value, kind, best cell), with
+# values from the point of view of the player to move and cells on the
+# canonical board (see symmetry.py)
+transpositions = {}
+
+SYMMETRY = symmetry_for(SIZE)
+
+# Counters describing the most recent call to minimax
+search_stats = {"nodes": 0, "lookups": 0, "hits": 0, "hit_rate": 0.0}
+
+
+def to_action(cell):
+    return divmod(cell, SIZE)
+
+
+def to_cell(action):
+    return SIZE * action[0] + action[1]
+
+
+def player(x, o):
+    """
+    Returns player who has the next turn.
+    """
+    return X if bin(x).count("1") == bin(o).count("1") else O
+
+
+def actions(x, o):
+    """
+    Returns the empty cells, in MOVE_ORDER.
+    """
+    taken = x | o
+    return [cell for cell in MOVE_ORDER if not taken >> cell & 1]
+
+
+def result(x, o, cell):
+    """
+    Returns the (x, o) masks after the player to move takes `cell`.
+    """
+    if (x | o) >> cell & 1:
+        raise Exception("Incorrect value input")
+    if player(x, o) == X:
+        return x | 1 << cell, o
+    return x, o | 1 << cell
+
+
+def winner(x, o):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    if has_line(x):
+        return X
+    if has_line(o):
+        return O
+    return None
+
+
+def terminal(x, o):
+    return winner(x, o) is not None or (x | o) == FULL
+
+
+def utility(x, o):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    won = winner(x, o)
+    return 1 if won == X else -1 if won == O else 0
+
+
+def minimax(board):
+    """
+    Returns the optimal action (i, j) for the current player on a
+    tictactoe board, or None if the game is over.
+    """
+    x, o = from_board(board)
+    if terminal(x, o):
+        return None
+
+    for key in search_stats:
+        search_stats[key] = 0
+    mover, other = (x, o) if player(x, o) == X else (o, x)
+    _, cell = negamax(mover, other, -2, 2)
+
+    if search_stats["lookups"]:
+        search_stats["hit_rate"] = search_stats["hits"] / search_stats["lookups"]
+    return to_action(cell)
+
+
+def negamax(mover, other, alpha, beta):
+    """
+    Returns (value, best cell) of a non-terminal position for the player
+    whose cells are `mover`, or a bound on the value outside the
+    (alpha, beta) window.
+    """
+    search_stats["nodes"] += 1
+    canonical_mover, canonical_other, transform = SYMMETRY.canonical(mover, other)
+    key = (canonical_mover, canonical_other)
+    search_stats["lookups"] += 1
+    entry = transpositions.get(key)
+    first = None
+    if entry is not None:
+        value, kind, first = entry
+        first = SYMMETRY.from_canonical(first, transform)
+        if decides(kind, value, alpha, beta):
+            search_stats["hits"] += 1
+            return value, first
+
+    original_alpha = alpha
+    taken = mover | other
+    best, best_cell = -2, None
+    cells = [cell for cell in MOVE_ORDER if not taken >> cell & 1]
+    if first is not None:
+        cells.remove(first)
+        cells.insert(0, first)
+
+    for cell in cells:
+        mine = mover | 1 << cell
+        # Only lines through the new cell can have been completed
+        if any(mine & line == line for line in CELL_LINES[cell]):
+            value = 1
+        elif mine | other == FULL:
+            value = 0
+        else:
+            value = -negamax(other, mine, -beta, -alpha)[0]
+        if value > best:
+            best, best_cell = value, cell
+        alpha = max(alpha, value)
+        if alpha >= beta:
+            break
+
+    kind = bound_kind(best, original_alpha, beta)
+    transpositions[key] = (best, kind, SYMMETRY.to_canonical(best_cell, transform))
+    return best, best_cell
@@ -0,0 +1,110 @@
+"""
+Perfect-play book for 3x3 tic-tac-toe
+
+Solves every reachable position once and writes a table of the best
+move and value for each, so that minimax can answer with one lookup.
+
+The file is MAGIC followed by one byte per board, indexed by the board
+read as a base 3 number (empty 0, X 1, O 2, cell (0, 0) least
+significant). Each byte holds the best cell (3 * i + j) in its low four
+bits and the value + 1 in the next two, or NO_ENTRY for finished and
+unreachable boards.
+
+Usage: python book.py [path]
+"""
+
+import os
+import sys
+
+import bitboard
+from tictactoe import X, O
+
+FILENAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+MAGIC = b"TTTBOOK1"
+POSITIONS = 3 ** bitboard.CELLS
+NO_ENTRY = 0xFF
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python book.py [path]")
+    path = sys.argv[1] if len(sys.argv) == 2 else FILENAME
+
+    table = solve()
+    write_book(table, path)
+    solved = sum(entry != NO_ENTRY for entry in table)
+    print(f"Wrote {solved} positions to {path}.")
+
+
+def solve():
+    """
+    Returns the table of best cells and values for every position
+    reachable from the empty board.
+    """
+    table = bytearray([NO_ENTRY]) * POSITIONS
+    seen = set()
+    stack = [(0, 0)]
+    while stack:
+        x, o = stack.pop()
+        if (x, o) in seen or bitboard.terminal(x, o):
+            continue
+        seen.add((x, o))
+
+        # Solve the position exactly from the mover's point of view
+        mover, other = (x, o) if bitboard.player(x, o) == X else (o, x)
+        value, cell = bitboard.negamax(mover, other, -2, 2)
+        if bitboard.player(x, o) == O:
+            value = -value
+        table[index(x, o)] = cell | (value + 1) << 4
+
+        for move in bitboard.actions(x, o):
+            stack.append(bitboard.result(x, o, move))
+    return table
+
+
+def write_book(table, path):
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(table)
+    os.replace(temporary, path)
+
+
+def load_book(path=FILENAME):
+    """
+    Returns the table stored at `path`, or None if there is no valid book.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if data[:len(MAGIC)] != MAGIC or len(data) != len(MAGIC) + POSITIONS:
+        return None
+    return data[len(MAGIC):]
+
+
+def index(x, o):
+    """
+    Returns the table index of a position given as bitmasks.
+    """
+    position = 0
+    for cell in range(bitboard.CELLS - 1, -1, -1):
+        position = position * 3 + (x >> cell & 1) + 2 * (o >> cell & 1)
+    return position
+
+
+def lookup(table, board):
+    """
+    Returns (action, value) for a board, where value is 1 if X wins with
+    perfect play, -1 if O does and 0 for a draw, or None if the board is
+    not in the table.
+    """
+    entry = table[index(*bitboard.from_board(board))]
+    if entry == NO_ENTRY:
+        return None
+    return bitboard.to_action(entry & 0xF), (entry >> 4) - 1
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Monte Carlo Tree Search player for m,n,k boards
+
+best_move grows a search tree from the current position for a fixed
+number of iterations or seconds. Each iteration picks a path down the
+tree by UCT, adds one new position, plays the rest of the game out at
+random on bitboards (see mnk.py), and credits the result to every
+position on the path. The most visited move is played, and the subtree
+under it is kept for the next turn.
+
+Usage: python mcts.py rows columns k [--budget 1.0]
+prints the move, playouts per second and nodes per second of this search
+and of mnk.best_move for O's reply to X taking the center, as JSON.
+"""
+
+import argparse
+import json
+import math
+import random
+import time
+
+import mnk
+import tictactoe
+
+# Exploration constant of UCT
+EXPLORATION = math.sqrt(2)
+
+# Result of a game for the player who made the last move
+WIN = 1.0
+DRAW = 0.5
+LOSS = 0.0
+
+# Root of the tree kept from the previous call, and its Game
+tree = None
+tree_game = None
+
+# Describes the most recent call to best_move
+search_stats = {
+    "playouts": 0, "seconds": 0.0, "playouts_per_second": 0.0, "reused": 0, "visits": 0
+}
+
+rng = random.Random()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare MCTS with minimax on one position.")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("columns", type=int)
+    parser.add_argument("k", type=int)
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds per engine")
+    args = parser.parse_args()
+
+    board = tictactoe.initial_state(args.rows, args.columns)
+    board[(args.rows - 1) // 2][(args.columns - 1) // 2] = tictactoe.X
+
+    move = best_move(board, args.k, args.budget)
+    runs = [{
+        "engine": "mcts",
+        "move": list(move),
+        "seconds": round(search_stats["seconds"], 3),
+        "playouts": search_stats["playouts"],
+        "playouts_per_second": round(search_stats["playouts_per_second"])
+    }]
+    move = mnk.best_move(board, args.k, args.budget)
+    stats = mnk.search_stats
+    runs.append({
+        "engine": "minimax",
+        "move": list(move),
+        "seconds": round(stats["seconds"], 3),
+        "nodes": stats["nodes"],
+        "nodes_per_second": round(stats["nodes"] / stats["seconds"]),
+        "depth": stats["depth"]
+    })
+    print(json.dumps({"rows": args.rows, "columns": args.columns, "k": args.k, "runs": runs}, indent=2))
+
+
+class Node():
+    """
+    A position in the search tree. `mover` holds the cells of the player
+    to move and `other` those of the player who just moved, who is the
+    one `score` counts results for.
+    """
+
+    __slots__ = ("mover", "other", "cell", "parent", "children", "untried",
+                 "visits", "score", "result")
+
+    def __init__(self, game, mover, other, cell=None, parent=None, result=None):
+        self.mover = mover
+        self.other = other
+        self.cell = cell
+        self.parent = parent
+        self.children = []
+        self.visits = 0
+        self.score = 0.0
+        # Result for the player who just moved if the game is over
+        self.result = result
+        self.untried = []
+        if result is None:
+            near = game.candidates(mover | other)
+            self.untried = [cell for cell in game.order if near >> cell & 1]
+            rng.shuffle(self.untried)
+
+    def select(self):
+        """
+        Returns the child with the highest upper confidence bound.
+        """
+        log_visits = math.log(self.visits)
+        return max(
+            self.children,
+            key=lambda child: child.score / child.visits
+            + EXPLORATION * math.sqrt(log_visits / child.visits)
+        )
+
+    def expand(self, game):
+        """
+        Adds the position after one untried move and returns it.
+        """
+        cell = self.untried.pop()
+        mine = self.mover | 1 << cell
+        result = None
+        if any(mine & line == line for line in game.cell_lines[cell]):
+            result = WIN
+        elif mine | self.other == game.full:
+            result = DRAW
+        child = Node(game, self.other, mine, cell, self, result)
+        self.children.append(child)
+        return child
+
+
+def best_move(board, k=None, budget=None, iterations=None):
+    """
+    Returns the action (i, j) the search prefers for the current player,
+    or None if the game is over. Stops after `iterations` iterations if
+    given, otherwise after `budget` seconds (default tictactoe.TIME_BUDGET).
+    `k` defaults to tictactoe.K.
+
+    Called with just a board it has the same contract as tictactoe.minimax.
+    """
+    global tree, tree_game
+    start = time.perf_counter()
+    k = tictactoe.K if k is None else k
+    if budget is None:
+        budget = tictactoe.TIME_BUDGET
+    game = mnk.game_for(len(board), len(board[0]), k)
+    x, o = game.from_board(board)
+    if game.has_line(x) or game.has_line(o) or (x | o) == game.full:
+        return None
+    mover, other = (x, o) if bin(x).count("1") == bin(o).count("1") else (o, x)
+
+    search_stats.update(playouts=0, reused=0, visits=0)
+    cell = decisive_move(game, mover, other)
+    if cell is None:
+        root = find(tree, mover, other) if tree_game is game else None
+        if root is None:
+            root = Node(game, mover, other)
+        else:
+            root.parent = None
+            search_stats["reused"] = root.visits
+
+        deadline = start + budget
+        playouts = 0
+        while (playouts < iterations) if iterations is not None else (time.perf_counter() < deadline):
+            iterate(game, root)
+            playouts += 1
+
+        search_stats["playouts"] = playouts
+        search_stats["visits"] = root.visits
+        if root.children:
+            best = max(root.children, key=lambda child: child.visits)
+            cell = best.cell
+            # Keep the tree under the chosen move for the next turn
+            tree, tree_game = best, game
+        else:
+            # Fall back on the most central candidate if no iteration ran
+            near = game.candidates(mover | other)
+            cell = next(cell for cell in game.order if near >> cell & 1)
+
+    seconds = time.perf_counter() - start
+    search_stats["seconds"] = seconds
+    search_stats["playouts_per_second"] = search_stats["playouts"] / seconds if seconds else 0.0
+    return divmod(cell, game.columns)
+
+
+def iterate(game, root):
+    """
+    Runs one selection, expansion, playout and backpropagation.
+    """
+    node = root
+    while not node.untried and node.children:
+        node = node.select()
+    if node.result is None and node.untried:
+        node = node.expand(game)
+
+    # Result for the player who made the move into `node`
+    result = node.result if node.result is not None else 1.0 - playout(game, node.mover, node.other)
+
+    while node is not None:
+        node.visits += 1
+        node.score += result
+        result = 1.0 - result
+        node = node.parent
+
+
+def playout(game, mover, other):
+    """
+    Plays random moves from a position and returns the result
+    for the player to move.
+    """
+    free = [cell for cell in range(game.cells) if not (mover | other) >> cell & 1]
+    rng.shuffle(free)
+    masks = [mover, other]
+    turn = 0
+    cell_lines = game.cell_lines
+    for cell in free:
+        mask = masks[turn] | 1 << cell
+        masks[turn] = mask
+        for line in cell_lines[cell]:
+            if mask & line == line:
+                return WIN if turn == 0 else LOSS
+        turn ^= 1
+    return DRAW
+
+
+def decisive_move(game, mover, other):
+    """
+    Returns a cell that wins at once, or else one that stops the
+    opponent winning at once, or None.
+    """
+    taken = mover | other
+    for player in (mover, other):
+        for cell in game.order:
+            if not taken >> cell & 1:
+                mine = player | 1 << cell
+                if any(mine & line == line for line in game.cell_lines[cell]):
+                    return cell
+    return None
+
+
+def find(node, mover, other, depth=2):
+    """
+    Returns the node for a position among `node` and its descendants
+    up to `depth` moves below it, or None.
+    """
+    if node is None:
+        return None
+    if node.mover == mover and node.other == other:
+        return node
+    if depth == 0:
+        return None
+    for child in node.children:
+        found = find(child, mover, other, depth - 1)
+        if found is not None:
+            return found
+    return None
+
+
+if __name__ == "__main__":
+    main()
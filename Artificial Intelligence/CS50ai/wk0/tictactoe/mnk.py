@@ -0,0 +1,305 @@
+"""
+m,n,k-game engine: tic-tac-toe on m x n boards with k in a row to win
+
+Boards too large to search to the end are searched to increasing depths
+(iterative deepening) until a wall-clock budget runs out, scoring the
+positions at the depth limit by the lines each player can still complete.
+Positions are bitboards as in bitboard.py, with cell (i, j) at bit
+i * columns + j.
+"""
+
+import time
+
+from symmetry import symmetry_for
+from table import bound_kind, decides
+from tictactoe import X, O, EMPTY
+
+# Scores at least WIN - (cells on the board) are forced wins
+WIN = 1 << 30
+
+# Extra empty cells around the pieces considered as moves on large boards
+RADIUS = 1
+# Boards with at most this many cells consider every empty cell
+SMALL = 16
+
+# Nodes searched between checks of the clock
+CLOCK_INTERVAL = 256
+
+# Transposition table entries kept between moves
+TABLE_LIMIT = 1 << 20
+
+# Game for each (rows, columns, k) played so far
+games = {}
+
+# Describes the most recent call to best_move
+search_stats = {"nodes": 0, "depth": 0, "value": 0, "seconds": 0.0, "complete": False}
+
+
+class TimeUp(Exception):
+    pass
+
+
+class Game():
+    """
+    Precomputed line masks, move order and transposition table
+    for one board size and k.
+    """
+
+    def __init__(self, rows, columns, k):
+        self.rows = rows
+        self.columns = columns
+        self.k = k
+        self.cells = rows * columns
+        self.full = (1 << self.cells) - 1
+
+        # Every run of k cells in a row, column or diagonal
+        self.lines = []
+        for i in range(rows):
+            for j in range(columns):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                    if 0 <= end_i < rows and 0 <= end_j < columns:
+                        self.lines.append(sum(
+                            1 << self.cell(i + di * step, j + dj * step) for step in range(k)
+                        ))
+        self.cell_lines = [
+            [line for line in self.lines if line >> cell & 1] for cell in range(self.cells)
+        ]
+
+        # Cells nearest the center first
+        center_i, center_j = (rows - 1) / 2, (columns - 1) / 2
+        self.order = sorted(
+            range(self.cells),
+            key=lambda cell: abs(cell // columns - center_i) + abs(cell % columns - center_j)
+        )
+
+        # Cells within RADIUS of each cell, for limiting moves on large boards
+        self.near = []
+        for cell in range(self.cells):
+            i, j = divmod(cell, columns)
+            self.near.append(sum(
+                1 << self.cell(a, b)
+                for a in range(max(0, i - RADIUS), min(rows, i + RADIUS + 1))
+                for b in range(max(0, j - RADIUS), min(columns, j + RADIUS + 1))
+            ))
+
+        # Score of a line holding n of one player's marks and none of the other's
+        self.weights = [0] + [4 ** n for n in range(1, k + 1)]
+
+        # Maps (mover, other) to (depth, value, kind, best cell), with
+        # values from the point of view of the player to move. On square
+        # boards positions are stored under their canonical symmetry
+        # (see symmetry.py), with the best cell on the canonical board
+        self.transpositions = {}
+        self.symmetry = symmetry_for(rows) if rows == columns else None
+
+    def cell(self, i, j):
+        return i * self.columns + j
+
+    def from_board(self, board):
+        """
+        Returns the (x, o) bitmasks of a board.
+        """
+        x = o = 0
+        for i in range(self.rows):
+            for j in range(self.columns):
+                if board[i][j] == X:
+                    x |= 1 << self.cell(i, j)
+                elif board[i][j] == O:
+                    o |= 1 << self.cell(i, j)
+        return x, o
+
+    def to_board(self, x, o):
+        """
+        Returns the board of (x, o) bitmasks.
+        """
+        return [
+            [X if x >> self.cell(i, j) & 1 else O if o >> self.cell(i, j) & 1 else EMPTY
+             for j in range(self.columns)]
+            for i in range(self.rows)
+        ]
+
+    def has_line(self, mask):
+        return any(mask & line == line for line in self.lines)
+
+    def candidates(self, taken):
+        """
+        Returns the mask of empty cells worth trying: all of them on
+        small boards, otherwise those near a piece (or the center).
+        """
+        free = self.full & ~taken
+        if self.cells <= SMALL:
+            return free
+        if not taken:
+            return 1 << self.order[0]
+        near = 0
+        for cell in range(self.cells):
+            if taken >> cell & 1:
+                near |= self.near[cell]
+        return near & free
+
+    def evaluate(self, mover, other):
+        """
+        Returns a heuristic score for the player to move: each line still
+        open to one player counts for them, more the fuller it is.
+        """
+        weights = self.weights
+        score = 0
+        for line in self.lines:
+            mine = mover & line
+            theirs = other & line
+            if not theirs:
+                if mine:
+                    score += weights[bin(mine).count("1")]
+            elif not mine:
+                score -= weights[bin(theirs).count("1")]
+        return score
+
+
+class Search():
+    """
+    One depth-limited alpha-beta search against a deadline.
+
+    If `record_depth` is given, the table entries it stores for positions
+    searched at least that deep are also kept in `recorded`, so a search
+    run in another process can hand them back (see parallel.py).
+    """
+
+    def __init__(self, game, deadline, record_depth=None):
+        self.game = game
+        self.deadline = deadline
+        self.record_depth = record_depth
+        self.recorded = {}
+        self.nodes = 0
+
+    def negamax(self, mover, other, near, depth, alpha, beta):
+        """
+        Returns (value, best cell) for the player whose cells are `mover`,
+        searching `depth` more moves, or a bound on the value outside
+        the (alpha, beta) window. `near` is the mask of candidate cells.
+        Raises TimeUp once the deadline has passed.
+        """
+        game = self.game
+        self.nodes += 1
+        if self.nodes % CLOCK_INTERVAL == 0 and time.perf_counter() > self.deadline:
+            raise TimeUp
+
+        if depth == 0:
+            return game.evaluate(mover, other), None
+
+        if game.symmetry is None:
+            key, transform = (mover, other), None
+        else:
+            canonical_mover, canonical_other, transform = game.symmetry.canonical(mover, other)
+            key = (canonical_mover, canonical_other)
+        entry = game.transpositions.get(key)
+        first = None
+        if entry is not None:
+            stored_depth, value, kind, first = entry
+            if first is not None and transform is not None:
+                first = game.symmetry.from_canonical(first, transform)
+            if stored_depth >= depth and decides(kind, value, alpha, beta):
+                return value, first
+
+        original_alpha = alpha
+        cells = [cell for cell in game.order if near >> cell & 1]
+        if first is not None and first in cells:
+            cells.remove(first)
+            cells.insert(0, first)
+
+        best, best_cell = -WIN - 1, None
+        for cell in cells:
+            value = self.play(mover, other, near, cell, depth, alpha, beta)
+            if value > best:
+                best, best_cell = value, cell
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        kind = bound_kind(best, original_alpha, beta)
+        stored = best_cell
+        if stored is not None and transform is not None:
+            stored = game.symmetry.to_canonical(stored, transform)
+        game.transpositions[key] = (depth, best, kind, stored)
+        if self.record_depth is not None and depth >= self.record_depth:
+            self.recorded[key] = game.transpositions[key]
+        return best, best_cell
+
+    def play(self, mover, other, near, cell, depth, alpha, beta):
+        """
+        Returns the value for `mover` of taking `cell`, searching the
+        reply to `depth` - 1 more moves within the (alpha, beta) window.
+        """
+        game = self.game
+        mine = mover | 1 << cell
+        if any(mine & line == line for line in game.cell_lines[cell]):
+            return WIN
+        if mine | other == game.full:
+            return 0
+
+        near |= game.near[cell] if game.cells > SMALL else 0
+        near &= ~(mine | other)
+        value = -self.negamax(other, mine, near, depth - 1, -beta, -alpha)[0]
+        # A win found further away is worth a little less
+        if value > WIN // 2:
+            value -= 1
+        elif value < -WIN // 2:
+            value += 1
+        return value
+
+
+def game_for(rows, columns, k):
+    """
+    Returns the Game for a board size and k, building it the first time.
+    """
+    if (rows, columns, k) not in games:
+        games[(rows, columns, k)] = Game(rows, columns, k)
+    return games[(rows, columns, k)]
+
+
+def best_move(board, k=3, budget=1.0, max_depth=None):
+    """
+    Returns the best action (i, j) found for the current player within
+    `budget` seconds (and `max_depth` moves, if given),
+    or None if the game is over.
+
+    Searches one move deeper at a time, keeping the move of the deepest
+    search that finished; the depth reached is left in `search_stats`.
+    """
+    start = time.perf_counter()
+    game = game_for(len(board), len(board[0]), k)
+    x, o = game.from_board(board)
+    if game.has_line(x) or game.has_line(o) or (x | o) == game.full:
+        return None
+
+    if len(game.transpositions) > TABLE_LIMIT:
+        game.transpositions.clear()
+
+    mover, other = (x, o) if bin(x).count("1") == bin(o).count("1") else (o, x)
+    taken = x | o
+    near = game.candidates(taken)
+    remaining = game.cells - bin(taken).count("1")
+    limit = remaining if max_depth is None else min(remaining, max_depth)
+
+    search = Search(game, start + budget)
+    # Fall back on the most central candidate if not even depth 1 finishes
+    move = next(cell for cell in game.order if near >> cell & 1)
+    search_stats.update(depth=0, value=0, complete=False)
+    # With a single candidate there is nothing to search
+    if near & (near - 1) == 0:
+        limit = 0
+    for depth in range(1, limit + 1):
+        try:
+            value, cell = search.negamax(mover, other, near, depth, -WIN - 1, WIN + 1)
+        except TimeUp:
+            break
+        move = cell
+        search_stats.update(depth=depth, value=value)
+        # Stop once the result is certain
+        if abs(value) > WIN // 2 or depth == remaining:
+            search_stats["complete"] = True
+            break
+
+    search_stats["nodes"] = search.nodes
+    search_stats["seconds"] = time.perf_counter() - start
+    return divmod(move, game.columns)
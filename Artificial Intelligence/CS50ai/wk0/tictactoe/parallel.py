@@ -0,0 +1,300 @@
+"""
+Parallel root-move search for the m,n,k engine
+
+The root is searched one depth at a time as in mnk.best_move. At each
+depth the most promising move is searched first in this process, and
+then every other candidate move is scored in its own task on a process
+pool. The pool is forked once per call, the first time it is needed, so
+that the workers start from the parent's transposition table, and each
+worker keeps its own table from one depth to the next. The best score
+found so far is shared with the workers as the alpha bound of later
+tasks. The table entries each task stores are merged back into the
+parent's table, and those stored by the parent or by another worker are
+passed on to each worker once, at its first task of the next depth. The
+pool is torn down as soon as a move is found to force a win.
+
+Usage: python parallel.py rows columns k depth [--workers 1,2,4]
+prints the time to search O's reply to X taking the center to `depth`,
+serially and with each pool size, as JSON.
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import pickle
+import shutil
+import tempfile
+import time
+
+import mnk
+from tictactoe import X, initial_state
+
+# Table entries searched at least this deep are shared between processes.
+# Keeping back deeper ones too costs more in extra nodes searched than it
+# saves in pickling: raising this to 2 or 3 searched 17-31% more nodes
+# on a 5x5 board to depth 9
+MERGE_DEPTH = 1
+
+# Describes the most recent call to best_move
+search_stats = {
+    "nodes": 0, "depth": 0, "value": 0, "seconds": 0.0, "complete": False, "workers": 0
+}
+
+# Best root value of the current depth, set in each worker by init_worker()
+shared_best = None
+
+# Number of update files merged into this worker's table (see Workers)
+applied = 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure parallel root search speedup.")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("columns", type=int)
+    parser.add_argument("k", type=int)
+    parser.add_argument("depth", type=int)
+    parser.add_argument("--workers", default=None,
+                        help="comma-separated pool sizes (default 1 up to the core count)")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    if args.workers:
+        sizes = [int(size) for size in args.workers.split(",")]
+    else:
+        sizes = sorted({2 ** i for i in range(cores.bit_length())} | {cores})
+
+    # On an empty board only the center is tried, so start one move in
+    board = initial_state(args.rows, args.columns)
+    board[(args.rows - 1) // 2][(args.columns - 1) // 2] = X
+    game = mnk.game_for(args.rows, args.columns, args.k)
+    runs = []
+    for workers in [0] + sizes:
+        # Every run starts from an empty table
+        game.transpositions.clear()
+        start = time.perf_counter()
+        if workers == 0:
+            move = mnk.best_move(board, args.k, math.inf, args.depth)
+            stats = mnk.search_stats
+        else:
+            move = best_move(board, args.k, math.inf, workers, args.depth)
+            stats = search_stats
+        seconds = time.perf_counter() - start
+        runs.append({
+            "workers": workers or "serial",
+            "seconds": round(seconds, 3),
+            "nodes": stats["nodes"],
+            "move": list(move)
+        })
+    for run in runs:
+        run["speedup"] = round(runs[0]["seconds"] / run["seconds"], 2)
+
+    print(json.dumps({
+        "rows": args.rows, "columns": args.columns, "k": args.k,
+        "depth": args.depth, "cores": cores, "runs": runs
+    }, indent=2))
+
+
+def best_move(board, k=3, budget=1.0, workers=None, max_depth=None):
+    """
+    Returns the best action (i, j) found for the current player within
+    `budget` seconds (and `max_depth` moves, if given), scoring the root
+    moves on `workers` processes (default: one per core),
+    or None if the game is over.
+    """
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    game = mnk.game_for(len(board), len(board[0]), k)
+    x, o = game.from_board(board)
+    if game.has_line(x) or game.has_line(o) or (x | o) == game.full:
+        return None
+    if len(game.transpositions) > mnk.TABLE_LIMIT:
+        game.transpositions.clear()
+
+    mover, other = (x, o) if bin(x).count("1") == bin(o).count("1") else (o, x)
+    taken = x | o
+    near = game.candidates(taken)
+    remaining = game.cells - bin(taken).count("1")
+    limit = remaining if max_depth is None else min(remaining, max_depth)
+    cells = [cell for cell in game.order if near >> cell & 1]
+
+    search_stats.update(nodes=0, depth=0, value=0, complete=False, workers=workers)
+    move = cells[0]
+    # With a single candidate there is nothing to search
+    if len(cells) == 1:
+        limit = 0
+
+    best_value = pool_context().Value("q", -mnk.WIN - 1)
+    pool = None
+    try:
+        for depth in range(1, limit + 1):
+            # Search the most promising move here first,
+            # so the others start with its score as their bound
+            search = mnk.Search(game, start + budget, MERGE_DEPTH)
+            try:
+                value = search.play(mover, other, near, cells[0], depth, -mnk.WIN - 1, mnk.WIN + 1)
+            except mnk.TimeUp:
+                break
+            finally:
+                search_stats["nodes"] += search.nodes
+            values = {cells[0]: value}
+            best = (value, cells[0])
+            best_value.value = value
+
+            finished = True
+            if value <= mnk.WIN // 2 and len(cells) > 1:
+                if pool is None:
+                    # Forked now, the workers already hold this search's entries
+                    pool = Workers(workers, best_value)
+                else:
+                    pool.fresh.setdefault(os.getpid(), {}).update(search.recorded)
+                finished = pool.search(game, k, mover, other, near, cells[1:], depth,
+                                       start + budget, values)
+                for cell in cells[1:]:
+                    # Later tasks only get upper bounds for moves no better than
+                    # an earlier one, so on ties the first move searched keeps it
+                    if cell in values and values[cell] > best[0]:
+                        best = (values[cell], cell)
+
+            if not finished and best[0] <= mnk.WIN // 2:
+                break
+            move = best[1]
+            search_stats.update(depth=depth, value=best[0])
+            if abs(best[0]) > mnk.WIN // 2 or depth == remaining:
+                search_stats["complete"] = True
+                break
+
+            # Try the most promising moves first at the next depth
+            cells.sort(key=lambda cell: -values.get(cell, -mnk.WIN - 1))
+    finally:
+        # Also cancels any tasks still running
+        if pool is not None:
+            pool.close()
+
+    search_stats["seconds"] = time.perf_counter() - start
+    return divmod(move, game.columns)
+
+
+class Workers():
+    """
+    A process pool kept for one call to best_move.
+
+    Table entries shared since the pool was forked are written to a
+    temporary directory at each depth, one file for each process that
+    stored some, with `fresh` collecting the next ones by process id.
+    Each task only names how many depths have been written, so every
+    worker reads each file once, skipping its own, rather than every
+    task carrying the entries.
+    """
+
+    def __init__(self, size, best_value):
+        self.best_value = best_value
+        self.pool = pool_context().Pool(size, initializer=init_worker, initargs=(best_value,))
+        self.directory = tempfile.mkdtemp(prefix="parallel-")
+        self.updates = 0
+        self.fresh = {}
+
+    def search(self, game, k, mover, other, near, cells, depth, deadline, values):
+        """
+        Score every move in `cells` on the pool, adding their values
+        to `values`. Returns False if the deadline passed before all
+        were scored.
+        """
+        for pid, entries in self.fresh.items():
+            with open(update_path(self.directory, self.updates, pid), "wb") as f:
+                pickle.dump(entries, f, pickle.HIGHEST_PROTOCOL)
+        self.updates += 1
+        self.fresh = {}
+        tasks = [
+            (game.rows, game.columns, k, mover, other, near, cell, depth, deadline,
+             self.directory, self.updates)
+            for cell in cells
+        ]
+
+        finished = True
+        best_value = self.best_value
+        for cell, value, nodes, recorded, pid in self.pool.imap_unordered(evaluate, tasks):
+            search_stats["nodes"] += nodes
+            merge(game, recorded)
+            self.fresh.setdefault(pid, {}).update(recorded)
+            if value is None:
+                finished = False
+                continue
+            values[cell] = value
+            with best_value.get_lock():
+                best_value.value = max(best_value.value, value)
+            if value > mnk.WIN // 2:
+                # A forced win: closing the pool cancels the other tasks
+                break
+        return finished
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def update_path(directory, depth, pid):
+    """
+    Returns the path of the entries process `pid` shared at a depth.
+    """
+    return os.path.join(directory, f"{depth}-{pid}.pickle")
+
+
+def init_worker(best):
+    global shared_best
+    shared_best = best
+
+
+def evaluate(task):
+    """
+    Returns (cell, value, nodes searched, recorded table entries,
+    process id) for one root move, with value None if the deadline
+    passed first.
+    """
+    global applied
+    rows, columns, k, mover, other, near, cell, depth, deadline, directory, updates = task
+    game = mnk.game_for(rows, columns, k)
+    # Catch up on the entries other processes shared since this worker's last task
+    if applied < updates:
+        names = set(os.listdir(directory))
+        for number in range(applied, updates):
+            for name in sorted(names):
+                if name.startswith(f"{number}-") and name != f"{number}-{os.getpid()}.pickle":
+                    with open(os.path.join(directory, name), "rb") as f:
+                        merge(game, pickle.load(f))
+        applied = updates
+
+    search = mnk.Search(game, deadline, MERGE_DEPTH)
+    try:
+        value = search.play(mover, other, near, cell, depth, shared_best.value, mnk.WIN + 1)
+    except mnk.TimeUp:
+        value = None
+    return cell, value, search.nodes, search.recorded, os.getpid()
+
+
+def merge(game, recorded):
+    """
+    Add table entries from a worker, keeping whichever of two
+    entries for the same position was searched deeper.
+    """
+    table = game.transpositions
+    for key, entry in recorded.items():
+        current = table.get(key)
+        if current is None or entry[0] >= current[0]:
+            table[key] = entry
+
+
+def pool_context():
+    """
+    Returns a fork context where available, so workers share the
+    parent's tables, falling back to spawn elsewhere.
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context("spawn")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,18 @@ import time
 
 import tictactoe as ttt
 
+# Board size and marks in a row needed to win, 3x3 with 3 by default
+if len(sys.argv) == 4:
+    rows, columns, ttt.K = (int(arg) for arg in sys.argv[1:])
+elif len(sys.argv) == 1:
+    rows, columns = 3, 3
+else:
+    sys.exit("Usage: python runner.py [rows columns k]")
+
+tile_size = min(80, 480 // max(rows, columns))
+
 pygame.init()
-size = width, height = 600, 400
+size = width, height = max(600, columns * tile_size + 80), max(400, rows * tile_size + 160)
 
 # Colors
 black = (0, 0, 0)
@@ -15,10 +25,10 @@ screen = pygame.display.set_mode(size)
 
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+moveFont = pygame.font.Font("OpenSans-Regular.ttf", tile_size * 3 // 4)
 
 user = None
-board = ttt.initial_state()
+board = ttt.initial_state(rows, columns)
 ai_turn = False
 
 while True:
@@ -67,13 +77,12 @@ while True:
     else:
         
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        tile_origin = (width / 2 - (columns / 2 * tile_size),
+                       height / 2 - (rows / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(rows):
             row = []
-            for j in range(3):
+            for j in range(columns):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -122,8 +131,8 @@ while True:
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(rows):
+                for j in range(columns):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
@@ -140,7 +149,7 @@ while True:
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
                     user = None
-                    board = ttt.initial_state()
+                    board = ttt.initial_state(rows, columns)
                     ai_turn = False
 
     pygame.display.flip()
@@ -0,0 +1,124 @@
+"""
+Board symmetries for square tic-tac-toe boards
+
+Rotating or reflecting a position does not change its value, so each of
+the (up to) 8 positions related by the symmetries of the square can be
+searched once, under a single canonical representative: the least of
+its images. Moves stored for the representative are mapped back to
+the board actually being played.
+
+Cell (i, j) of an n x n board is numbered n * i + j, as in bitboard.py
+and mnk.py.
+"""
+
+# Maps each transformation to the one that undoes it
+INVERSE = [0, 3, 2, 1, 4, 5, 6, 7]
+
+
+def transform_point(transform, i, j, n):
+    """
+    Returns where cell (i, j) of an n x n board goes under a transformation:
+    identity, three rotations, then four reflections.
+    """
+    return [
+        (i, j),
+        (j, n - 1 - i),
+        (n - 1 - i, n - 1 - j),
+        (n - 1 - j, i),
+        (i, n - 1 - j),
+        (n - 1 - i, j),
+        (j, i),
+        (n - 1 - j, n - 1 - i)
+    ][transform]
+
+
+class Symmetry():
+    """
+    Cell permutations of the 8 symmetries of an n x n board, with byte
+    lookup tables that transform a bitmask 8 cells at a time.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.cells = size * size
+        self.permutations = []
+        for transform in range(8):
+            permutation = []
+            for cell in range(self.cells):
+                i, j = transform_point(transform, cell // size, cell % size, size)
+                permutation.append(size * i + j)
+            self.permutations.append(permutation)
+
+        # tables[t][chunk][byte] is the image under t of the cells
+        # 8 * chunk to 8 * chunk + 7 selected by the bits of `byte`
+        self.chunks = -(-self.cells // 8)
+        self.tables = []
+        for permutation in self.permutations:
+            chunks = []
+            for chunk in range(self.chunks):
+                table = [0] * 256
+                for byte in range(1, 256):
+                    low = byte & -byte
+                    cell = 8 * chunk + low.bit_length() - 1
+                    image = 1 << permutation[cell] if cell < self.cells else 0
+                    table[byte] = table[byte ^ low] | image
+                chunks.append(table)
+            self.tables.append(chunks)
+
+    def transform(self, mask, transform):
+        """
+        Returns the image of a bitmask of cells under a transformation.
+        """
+        image = 0
+        for table in self.tables[transform]:
+            image |= table[mask & 0xFF]
+            mask >>= 8
+        return image
+
+    def canonical(self, x, o):
+        """
+        Returns (x, o, transform): the canonical representative of a
+        position given as bitmasks and the transformation leading to it.
+        """
+        best = (x, o, 0)
+        for transform in range(1, 8):
+            image = (self.transform(x, transform), self.transform(o, transform))
+            if image < best[:2]:
+                best = image + (transform,)
+        return best
+
+    def canonical_board(self, board):
+        """
+        Returns (key, transform): a hashable canonical form of a list
+        board and the transformation leading to it.
+        """
+        # Empty cells become "" so that every cell compares as a string
+        flat = [cell or "" for row in board for cell in row]
+        best = None
+        for transform, permutation in enumerate(self.permutations):
+            image = [""] * self.cells
+            for cell, mark in enumerate(flat):
+                image[permutation[cell]] = mark
+            image = tuple(image)
+            if best is None or image < best[0]:
+                best = (image, transform)
+        return best
+
+    def to_canonical(self, cell, transform):
+        return self.permutations[transform][cell]
+
+    def from_canonical(self, cell, transform):
+        return self.permutations[INVERSE[transform]][cell]
+
+
+# Symmetry for each board size used so far
+symmetries = {}
+
+
+def symmetry_for(size):
+    """
+    Returns the Symmetry of an n x n board, building it the first time.
+    """
+    if size not in symmetries:
+        symmetries[size] = Symmetry(size)
+    return symmetries[size]
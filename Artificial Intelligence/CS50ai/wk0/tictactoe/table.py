@@ -0,0 +1,32 @@
+"""
+Transposition table bounds shared by the tic-tac-toe engines
+
+Alpha-beta only proves a position's exact value when the value falls
+inside the (alpha, beta) window it was searched with; otherwise the
+value is a bound. Entries record which, so that a later search with a
+different window knows whether it can use them.
+"""
+
+# Kinds of value stored in a transposition table
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+def bound_kind(value, alpha, beta):
+    """
+    Returns the kind of a value found searching with the (alpha, beta) window.
+    """
+    if value <= alpha:
+        return UPPER
+    if value >= beta:
+        return LOWER
+    return EXACT
+
+
+def decides(kind, value, alpha, beta):
+    """
+    Returns True if a stored value of this kind settles a search
+    with the (alpha, beta) window.
+    """
+    return kind == EXACT or (kind == LOWER and value >= beta) or (kind == UPPER and value <= alpha)
@@ -6,18 +6,47 @@ import math
 import copy
 import random
 
+from symmetry import symmetry_for
+from table import bound_kind, decides
+
 X = "X"
 O = "O"
 EMPTY = None
 
+# Number of marks in a row needed to win
+K = 3
+
+# Seconds the AI may think on boards other than 3x3 with K = 3,
+# which are too large to search to the end (see mnk.py)
+TIME_BUDGET = 1.0
+
+# Processes searching those boards; more than 1 splits the root moves
+# between them (see parallel.py)
+WORKERS = 1
+
+# Cells tried first by the search: center, then corners, then edges
+MOVE_ORDER = [(1, 1), (0, 0), (0, 2), (2, 0), (2, 2), (0, 1), (1, 0), (1, 2), (2, 1)]
+
+# Maps board keys to (value, kind, best action) for positions already
+# searched; kept between calls since a position's value never changes.
+# Rotations and reflections of a board share its key, and the best
+# action is stored as played on the key's canonical board
+transpositions = {}
 
-def initial_state():
+# Perfect-play table written by book.py: False until first needed,
+# then None if there is no book file
+opening_book = False
+
+# Counters describing the most recent call to minimax, and whether
+# it was answered from the book
+search_stats = {"nodes": 0, "lookups": 0, "hits": 0, "hit_rate": 0.0, "book": False}
+
+
+def initial_state(rows=3, columns=3):
     """
     Returns starting state of the board.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return [[EMPTY] * columns for _ in range(rows)]
 
 
 def player(board):
@@ -25,10 +54,7 @@ def player(board):
     Returns player who has the next turn on a board.
     """         
     # Return player according to odd or pair number of moves
-    if played(board) == 0:
-        return X
-    else:
-        return X if played(board) % 2 == 0 else O
+    return X if played(board) % 2 == 0 else O
 
 
 def actions(board):
@@ -39,8 +65,8 @@ def actions(board):
     moves = set()
     
     # Add to available move set empty cells
-    for i in range(3):
-        for j in range(3):
+    for i in range(len(board)):
+        for j in range(len(board[0])):
             if board[i][j] is EMPTY:
                 moves.add((i, j))
     
@@ -91,7 +117,7 @@ def terminal(board):
         return True
     
     # Check for available cells
-    if played(board) == 9:
+    if played(board) == len(board) * len(board[0]):
         return True
 
     return False
@@ -111,141 +137,264 @@ def utility(board):
 
 def minimax(board):
     """
-    Returns the optimal action for the current player on the board.
+    Returns the optimal action for the current player on the board,
+    or None if the game is over.
+
+    Looks the board up in the opening book when there is one, otherwise
+    searches with alpha-beta pruning and a transposition table that
+    persists between calls; the work done is left in `search_stats`.
+
+    Other board sizes and values of K are handed to mnk.best_move,
+    or parallel.best_move if WORKERS > 1, which play the best move
+    they find within TIME_BUDGET.
     """
+    if len(board) != 3 or len(board[0]) != 3 or K != 3:
+        # Imported here as mnk and parallel themselves import this module
+        if WORKERS > 1:
+            import parallel
+            return parallel.best_move(board, K, TIME_BUDGET, WORKERS)
+        import mnk
+        return mnk.best_move(board, K, TIME_BUDGET)
+
+    if terminal(board):
+        return None
+
+    for key in search_stats:
+        search_stats[key] = 0
+    search_stats["book"] = False
+
+    # Imported here as book itself imports this module
+    import book
+    global opening_book
+    if opening_book is False:
+        opening_book = book.load_book()
+    if opening_book is not None:
+        found = book.lookup(opening_book, board)
+        if found is not None:
+            search_stats["book"] = True
+            return found[0]
+
+    search_stats["nodes"] = 1
+
     # Current player's move
     plyr = player(board)
 
-    # Get set of actions
-    actns = actions(board)
-    
-    # Array of (utility, action) pairs
-    results = []
+    # Best (utility, action) found so far
+    best = None
+    alpha, beta = -2, 2
 
-    if plyr is X:
-        for action in actns:
+    for action in ordered_actions(board):
+        if plyr is X:
             # Get min_value for action
-            results.append([min_value(result(board, action)), action])
-        # Sort results by utility
-        results = sorted(results, key=lambda x: x[0])
-        # Return action of last element (the one with the highest utility)
-        return results[-1][1]
-    else:
-        for action in actns:
+            v = min_value(result(board, action), alpha, beta)
+            if best is None or v > best[0]:
+                best = (v, action)
+            alpha = max(alpha, v)
+        else:
             # Get max_value for action
-            results.append([max_value(result(board, action)), action])
-        # Sort results by utility
-        results = sorted(results, key=lambda x: x[0])
-        # Return action of first element (the one with the least utility)
-        return results[0][1]
+            v = max_value(result(board, action), alpha, beta)
+            if best is None or v < best[0]:
+                best = (v, action)
+            beta = min(beta, v)
+        # No other move can do better than a win
+        if best[0] == (1 if plyr is X else -1):
+            break
+
+    if search_stats["lookups"]:
+        search_stats["hit_rate"] = search_stats["hits"] / search_stats["lookups"]
+    return best[1]
 
 
-def max_value(board):
+def max_value(board, alpha=-2, beta=2):
     """
-    Return max value
+    Return max value, or a bound on it outside the (alpha, beta) window
     """
+    search_stats["nodes"] += 1
     if terminal(board):
         return utility(board)
-        
+
+    # Reuse earlier work on this position if it settles the value
+    key, transform = board_key(board)
+    found, v, first = probe(key, alpha, beta, transform)
+    if found:
+        return v
+    original_alpha = alpha
+
     # No utility value is lower than 2
     v = -2
-    
+    best = None
+
     # Recursively call fucntions
-    for action in actions(board):
-        v = max(v, min_value(result(board, action)))
-            
+    for action in ordered_actions(board, first):
+        child = min_value(result(board, action), alpha, beta)
+        if child > v:
+            v, best = child, action
+        alpha = max(alpha, v)
+        # Min would never allow this position
+        if alpha >= beta:
+            break
+
+    store(key, v, original_alpha, beta, best, transform)
     return v
     
     
-def min_value(board):
+def min_value(board, alpha=-2, beta=2):
     """
-    Return min value
+    Return min value, or a bound on it outside the (alpha, beta) window
     """
+    search_stats["nodes"] += 1
     if terminal(board):
         return utility(board)
-        
+
+    # Reuse earlier work on this position if it settles the value
+    key, transform = board_key(board)
+    found, v, first = probe(key, alpha, beta, transform)
+    if found:
+        return v
+    original_beta = beta
+
     # No utility value is higher than 2
     v = 2
-    
+    best = None
+
     # Recursively call fucntions
-    for action in actions(board):
-        v = min(v, max_value(result(board, action)))
-            
+    for action in ordered_actions(board, first):
+        child = max_value(result(board, action), alpha, beta)
+        if child < v:
+            v, best = child, action
+        beta = min(beta, v)
+        # Max would never allow this position
+        if alpha >= beta:
+            break
+
+    store(key, v, alpha, original_beta, best, transform)
     return v
 
 
+def ordered_actions(board, first=None):
+    """
+    Returns the available actions, most promising first: `first`
+    (the best action found by an earlier search) and then MOVE_ORDER.
+    """
+    moves = [action for action in MOVE_ORDER if board[action[0]][action[1]] is EMPTY]
+    if first is not None and first in moves:
+        moves.remove(first)
+        moves.insert(0, first)
+    return moves
+
+
+def board_key(board):
+    """
+    Returns (key, transform): a hashable key shared by every rotation
+    and reflection of the board, and the symmetry taking it to the key.
+    """
+    return symmetry_for(len(board)).canonical_board(board)
+
+
+def map_action(action, transform, inverse=False):
+    """
+    Returns where an action goes under a symmetry of a 3x3 board,
+    or comes from if `inverse` is True.
+    """
+    symmetry = symmetry_for(3)
+    cell = 3 * action[0] + action[1]
+    if inverse:
+        return divmod(symmetry.from_canonical(cell, transform), 3)
+    return divmod(symmetry.to_canonical(cell, transform), 3)
+
+
+def probe(key, alpha, beta, transform):
+    """
+    Look a position up in the transposition table. Returns
+    (True, value, best action) if the stored result decides the value
+    within the (alpha, beta) window, else (False, None, best action).
+    """
+    search_stats["lookups"] += 1
+    entry = transpositions.get(key)
+    if entry is None:
+        return False, None, None
+    value, kind, action = entry
+    if action is not None:
+        action = map_action(action, transform, inverse=True)
+    if decides(kind, value, alpha, beta):
+        search_stats["hits"] += 1
+        return True, value, action
+    return False, None, action
+
+
+def store(key, value, alpha, beta, action, transform):
+    """
+    Record a searched position's value, noting whether it is exact
+    or only a bound because the (alpha, beta) window cut the search.
+    """
+    kind = bound_kind(value, alpha, beta)
+    transpositions[key] = (value, kind, map_action(action, transform))
+
+
 def check_rows(board):
     """
     Check rows to see if there is a winner
     """
-    players = [X, O]
-    # Amoun of moves in the same row
-    count = 0
+    for row in board:
+        plyr = check_line(row)
+        if plyr:
+            return plyr
 
-    # Check board looking for both players moves
-    for plyr in players:    
-        # Iterate over rows
-        for i in range(3):
-            # Check to see if all moves in a row are by the same player
-            if count == 3:
-                return plyr
-            # Restart counter
-            count = 0
-            # Iterate over cells in a row
-            for j in range(3):
-                # Count player's moves in a row
-                if board[i][j] == plyr:
-                    count += 1
-    
     return None
-    
+
 
 def check_columns(board):
     """
     Check columns to see if there is a winner
     """
-    players = [X, O]
-    # Amoun of moves in the same column
-    count = 0
+    for j in range(len(board[0])):
+        plyr = check_line([row[j] for row in board])
+        if plyr:
+            return plyr
 
-    # Check board looking for both players moves
-    for plyr in players:    
-        # Iterate over columns
-        for j in range(3):
-            # Check to see if all moves in a column are by the same player
-            if count == 3:
-                return plyr
-            # Restart counter
-            count = 0
-            # Iterate over cells in a column
-            for i in range(3):
-                # Count player's moves in a column
-                if board[i][j] == plyr:
-                    count += 1
-    
     return None
-    
+
 
 def check_diagonals(board):
     """
     Check diagonals for winner
     """
-    players = [X, O]
-    # Amount of moves along diagonals
-    for plyr in players:
-        # If player doesn't have middle cell skip
-        if board[1][1] is not plyr:
-            continue
-        else:
-            # Chech both cases
-            if board[0][0] == plyr and board[2][2] == plyr:
-                return plyr
-            elif board[2][0] == plyr and board[0][2] == plyr:
-                return plyr
-    
+    rows, columns = len(board), len(board[0])
+    # Every diagonal starts on the top row or the left or right column
+    for start in range(1 - rows, columns):
+        # Going down and to the right
+        plyr = check_line([
+            board[i][start + i] for i in range(rows) if 0 <= start + i < columns
+        ])
+        if plyr:
+            return plyr
+        # Going down and to the left
+        plyr = check_line([
+            board[i][columns - 1 - start - i] for i in range(rows)
+            if 0 <= columns - 1 - start - i < columns
+        ])
+        if plyr:
+            return plyr
+
     return None
-    
-    
+
+
+def check_line(cells):
+    """
+    Returns the player with K marks in a row among `cells`, if any
+    """
+    count = 0
+    previous = EMPTY
+    for cell in cells:
+        # Count the length of the current run of the same mark
+        count = count + 1 if cell == previous else 1
+        previous = cell
+        if cell is not EMPTY and count >= K:
+            return cell
+
+    return None
+
+
 def played(board):
     """
     Return the amount of cells available in the board
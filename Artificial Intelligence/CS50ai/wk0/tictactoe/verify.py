@@ -0,0 +1,173 @@
+"""
+Check every 3x3 engine against a brute-force solver
+
+The solver below shares no code with the engines: it plays out every
+continuation of a plain tuple board. For every position reachable from
+the empty board it checks that
+
+    - tictactoe.winner and tictactoe.terminal agree with the solver
+    - tictactoe.minimax (from a cold and from a warm table, and from the
+      opening book), bitboard.minimax and mnk.best_move each play a move
+      that keeps the position's value
+    - the opening book stores the position's value
+
+Prints the number of positions checked, or each failure, and exits with
+status 1 if there was one.
+
+Usage: python verify.py
+"""
+
+import math
+import sys
+
+import bitboard
+import book
+import mnk
+import tictactoe
+from tictactoe import X, O, EMPTY
+
+LINES = [
+    [(0, 0), (0, 1), (0, 2)], [(1, 0), (1, 1), (1, 2)], [(2, 0), (2, 1), (2, 2)],
+    [(0, 0), (1, 0), (2, 0)], [(0, 1), (1, 1), (2, 1)], [(0, 2), (1, 2), (2, 2)],
+    [(0, 0), (1, 1), (2, 2)], [(0, 2), (1, 1), (2, 0)]
+]
+
+# Maps boards (as tuples of rows) to their value for X
+values = {}
+
+
+def main():
+    if len(sys.argv) != 1:
+        sys.exit("Usage: python verify.py")
+
+    failures = []
+    positions = reachable()
+    table = book.load_book()
+    if table is None:
+        failures.append("no opening book")
+
+    for board in positions:
+        key = freeze(board)
+        if tictactoe.winner(board) != winner(key):
+            failures.append(f"winner of {key}")
+        over = winner(key) is not None or all(mark is not EMPTY for row in key for mark in row)
+        if tictactoe.terminal(board) != over:
+            failures.append(f"terminal of {key}")
+        if over:
+            continue
+
+        for engine, move in engine_moves(board):
+            if move is None or key[move[0]][move[1]] is not EMPTY:
+                failures.append(f"{engine} played {move} on {key}")
+            elif value_after(key, move) != value(key):
+                failures.append(f"{engine} played {move} on {key}, losing value")
+
+        if table is not None:
+            found = book.lookup(table, board)
+            if found is None or found[1] != value(key):
+                failures.append(f"book entry of {key}")
+
+    for failure in failures:
+        print(failure)
+    checked = sum(not tictactoe.terminal(board) for board in positions)
+    print(f"Checked {len(positions)} positions, {checked} with a move to play, "
+          f"{len(failures)} failures.")
+    if failures:
+        sys.exit(1)
+
+
+def engine_moves(board):
+    """
+    Returns (engine, move) for every engine on a board.
+    """
+    moves = []
+
+    # The search, without the book, from an empty and from a warm table
+    tictactoe.opening_book = None
+    tictactoe.transpositions.clear()
+    moves.append(("minimax (cold)", tictactoe.minimax(board)))
+    moves.append(("minimax (warm)", tictactoe.minimax(board)))
+    # Reloaded from book.bin on the next call
+    tictactoe.opening_book = False
+    moves.append(("minimax (book)", tictactoe.minimax(board)))
+
+    bitboard.transpositions.clear()
+    moves.append(("bitboard", bitboard.minimax(board)))
+    mnk.game_for(3, 3, 3).transpositions.clear()
+    moves.append(("mnk", mnk.best_move(board, 3, math.inf)))
+    return moves
+
+
+def reachable():
+    """
+    Returns every board reachable from the empty board, once each.
+    """
+    seen = set()
+    boards = []
+    stack = [tictactoe.initial_state()]
+    while stack:
+        board = stack.pop()
+        key = freeze(board)
+        if key in seen:
+            continue
+        seen.add(key)
+        boards.append(board)
+        if winner(key) is not None:
+            continue
+        mark = to_move(key)
+        for i in range(3):
+            for j in range(3):
+                if board[i][j] is EMPTY:
+                    child = [row[:] for row in board]
+                    child[i][j] = mark
+                    stack.append(child)
+    return boards
+
+
+def freeze(board):
+    return tuple(tuple(row) for row in board)
+
+
+def winner(key):
+    for line in LINES:
+        marks = {key[i][j] for i, j in line}
+        if len(marks) == 1 and EMPTY not in marks:
+            return marks.pop()
+    return None
+
+
+def to_move(key):
+    marks = [mark for row in key for mark in row]
+    return X if marks.count(X) == marks.count(O) else O
+
+
+def value(key):
+    """
+    Returns 1 if X wins with perfect play from a board, -1 if O does, else 0.
+    """
+    if key in values:
+        return values[key]
+    won = winner(key)
+    empty = [(i, j) for i in range(3) for j in range(3) if key[i][j] is EMPTY]
+    if won is not None:
+        result = 1 if won == X else -1
+    elif not empty:
+        result = 0
+    else:
+        children = [value_after(key, move) for move in empty]
+        result = max(children) if to_move(key) == X else min(children)
+    values[key] = result
+    return result
+
+
+def value_after(key, move):
+    """
+    Returns the value of a board after the player to move plays `move`.
+    """
+    rows = [list(row) for row in key]
+    rows[move[0]][move[1]] = to_move(key)
+    return value(freeze(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,17 @@
 import itertools
+import math
 import random
+from collections import deque
 from termcolor import colored
 
+# Backtracking steps allowed when counting a component's mine layouts
+# before sampling layouts instead
+ENUMERATION_LIMIT = 20000
+# Layouts drawn from a component too large to count, and the steps
+# allowed per cell for drawing each
+SAMPLES = 100
+SAMPLE_STEPS = 10
+
 
 class Minesweeper():
     """
@@ -114,7 +124,7 @@ class Sentence():
         """
         Returns the set of all cells in self.cells known to be safe.
         """
-        raise self.safes
+        return self.safes
 
     def mark_mine(self, cell):
         """
@@ -134,19 +144,166 @@ class Sentence():
         if cell in self.cells:
             self.cells.remove(cell)
             self.safes.add(cell)
-        
+
+    def __len__(self):
+        return len(self.cells)
+
+    def keys(self):
+        """
+        Returns the cells as MinesweeperAI indexes them.
+        """
+        return self.cells
+
+    def same_cells(self, other):
+        return self.cells == other.cells
+
+    def is_proper_subset(self, other):
+        """
+        Returns True if this sentence's cells are a proper subset of other's.
+        """
+        return self.cells < other.cells
+
+    def subtract(self, subset):
+        """
+        Removes the cells and count of `subset`, a sentence whose cells
+        are a proper subset of these.
+        """
+        self.cells -= subset.cells
+        self.count -= subset.count
+
+
+class BitSentence():
+    """
+    Sentence with its cells stored as a bitmask, cell (i, j) of a board
+    `width` cells wide being bit i * width + j, so that comparing and
+    subtracting sentences are single integer operations.
+
+    Cells go in and come out as (i, j) tuples, as with Sentence.
+    """
+
+    __slots__ = ("bits", "count", "width", "mine_bits", "safe_bits")
+
+    def __init__(self, cells, count, width):
+        self.width = width
+        self.bits = 0
+        for i, j in cells:
+            self.bits |= 1 << (i * width + j)
+        self.count = count
+        self.mine_bits = 0
+        self.safe_bits = 0
+
+    @classmethod
+    def from_sentence(cls, sentence, width):
+        bit_sentence = cls(sentence.cells, sentence.count, width)
+        for i, j in sentence.mines:
+            bit_sentence.mine_bits |= 1 << (i * width + j)
+        for i, j in sentence.safes:
+            bit_sentence.safe_bits |= 1 << (i * width + j)
+        return bit_sentence
+
+    def to_sentence(self):
+        sentence = Sentence(self.cells, self.count)
+        sentence.mines = self.known_mines()
+        sentence.safes = self.known_safes()
+        return sentence
+
+    def to_cells(self, bits):
+        """
+        Returns the set of (i, j) cells of a bitmask.
+        """
+        cells = set()
+        while bits:
+            low = bits & -bits
+            cells.add(divmod(low.bit_length() - 1, self.width))
+            bits ^= low
+        return cells
+
+    @property
+    def cells(self):
+        return self.to_cells(self.bits)
+
+    def __eq__(self, other):
+        return self.bits == other.bits and self.count == other.count
+
+    def __str__(self):
+        return f"{self.cells} = {self.count}"
+
+    def __len__(self):
+        return self.bits.bit_count()
+
+    def keys(self):
+        """
+        Returns the bit numbers of the cells, as MinesweeperAI indexes them.
+        """
+        keys = []
+        bits = self.bits
+        while bits:
+            low = bits & -bits
+            keys.append(low.bit_length() - 1)
+            bits ^= low
+        return keys
+
+    def known_mines(self):
+        """
+        Returns the set of all cells in self.cells known to be mines.
+        """
+        return self.to_cells(self.mine_bits)
+
+    def known_safes(self):
+        """
+        Returns the set of all cells in self.cells known to be safe.
+        """
+        return self.to_cells(self.safe_bits)
+
+    def mark_mine(self, cell):
+        bit = 1 << (cell[0] * self.width + cell[1])
+        if self.bits & bit:
+            self.count -= 1
+            self.bits ^= bit
+            self.mine_bits |= bit
+
+    def mark_safe(self, cell):
+        bit = 1 << (cell[0] * self.width + cell[1])
+        if self.bits & bit:
+            self.bits ^= bit
+            self.safe_bits |= bit
+
+    def same_cells(self, other):
+        return self.bits == other.bits
+
+    def is_proper_subset(self, other):
+        """
+        Returns True if this sentence's cells are a proper subset of other's.
+        """
+        return self.bits != other.bits and self.bits & ~other.bits == 0
+
+    def subtract(self, subset):
+        """
+        Removes the cells and count of `subset`, a sentence whose cells
+        are a proper subset of these.
+        """
+        self.bits &= ~subset.bits
+        self.count -= subset.count
+
 
 class MinesweeperAI():
     """
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, bitset=False, mine_count=None):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Number of mines on the board, if known, for weighing guesses
+        self.mine_count = mine_count
+
+        # Store sentences as BitSentence rather than Sentence,
+        # which is faster on large boards
+        self.bitset = bitset
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -154,8 +311,26 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Cells known to be safe but not clicked on yet
+        self.safe_moves = set()
+
+        # Cells neither clicked on nor known to be mines
+        self.unopened = set(itertools.product(range(height), range(width)))
+
+        # Sentences about the game known to be true, by id
+        self.knowledge = {}
+        # Ids of the sentences each cell appears in, by the cell's key()
+        self.containing = {}
+        self.next_id = 0
+
+        # Ids of sentences that changed since updater() last looked at them
+        self.worklist = deque()
+        self.queued = set()
+
+        # Sentences taken off the worklist by the most recent move,
+        # and by every move so far in order
+        self.propagation_steps = 0
+        self.steps_per_move = []
 
     def mark_mine(self, cell):
         """
@@ -163,8 +338,12 @@ class MinesweeperAI():
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self.unopened.discard(cell)
+        # Only the sentences holding the cell change
+        changed = self.containing.pop(self.key(cell), set())
+        for sentence_id in changed:
+            self.knowledge[sentence_id].mark_mine(cell)
+        self.settle(changed)
 
     def mark_safe(self, cell):
         """
@@ -172,37 +351,131 @@ class MinesweeperAI():
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
-            
-    
+        if cell not in self.moves_made:
+            self.safe_moves.add(cell)
+        changed = self.containing.pop(self.key(cell), set())
+        for sentence_id in changed:
+            self.knowledge[sentence_id].mark_safe(cell)
+        self.settle(changed)
+
+    def key(self, cell):
+        """
+        Returns the key of a cell in self.containing: its bit number
+        when sentences are BitSentences, otherwise the cell itself.
+        """
+        return cell[0] * self.width + cell[1] if self.bitset else cell
+
+    def add_sentence(self, cells, count):
+        """
+        Adds a sentence to the knowledge base unless it has no cells.
+        """
+        if not cells:
+            return
+        sentence_id = self.next_id
+        self.next_id += 1
+        if self.bitset:
+            self.knowledge[sentence_id] = BitSentence(cells, count, self.width)
+        else:
+            self.knowledge[sentence_id] = Sentence(cells, count)
+        for key in self.knowledge[sentence_id].keys():
+            self.containing.setdefault(key, set()).add(sentence_id)
+        self.settle([sentence_id])
+
+    def remove_sentence(self, sentence_id):
+        sentence = self.knowledge.pop(sentence_id)
+        for key in sentence.keys():
+            self.containing[key].discard(sentence_id)
+
+    def subtract(self, sentence_id, subset):
+        """
+        Replaces a sentence with what it says beyond `subset`, a sentence
+        whose cells are a proper subset of its own.
+        """
+        sentence = self.knowledge[sentence_id]
+        for key in subset.keys():
+            self.containing[key].discard(sentence_id)
+        sentence.subtract(subset)
+
+    def enqueue(self, sentence_id):
+        if sentence_id not in self.queued:
+            self.queued.add(sentence_id)
+            self.worklist.append(sentence_id)
+
+    def settle(self, pending):
+        """
+        Compares each changed sentence with the sentences sharing a cell
+        with it until nothing changes, dropping empty and duplicate
+        sentences.
+
+        Where one sentence's cells are a proper subset of another's, the
+        larger sentence is replaced by the difference: it follows from the
+        two, so nothing is lost and the knowledge base never holds more
+        sentences than moves made.
+
+        Every sentence left changed is queued for updater().
+        """
+        pending = list(pending)
+        while pending:
+            sentence_id = pending.pop()
+            sentence = self.knowledge.get(sentence_id)
+            if sentence is None:
+                continue
+            if not len(sentence):
+                self.remove_sentence(sentence_id)
+                continue
+            self.enqueue(sentence_id)
+
+            # Any sentence in a subset relation with this one shares a cell
+            neighbours = set()
+            for key in sentence.keys():
+                neighbours |= self.containing[key]
+            neighbours.discard(sentence_id)
+
+            for other_id in neighbours:
+                other = self.knowledge[other_id]
+                if other.same_cells(sentence):
+                    # Already known
+                    self.remove_sentence(sentence_id)
+                    break
+                elif sentence.is_proper_subset(other):
+                    self.subtract(other_id, sentence)
+                    pending.append(other_id)
+                elif other.is_proper_subset(sentence):
+                    self.subtract(sentence_id, other)
+                    # Compare what is left of it again
+                    pending.append(sentence_id)
+                    break
+
     def updater(self):
         """
-        Updates sentences if new safe cells mines can be added.
+        Marks the cells of every queued sentence whose count settles them,
+        until no queued sentences are left.
+
+        Marking a cell changes only the sentences holding it, which are
+        queued in turn, so this runs to a fixed point: no sentence left
+        determines any of its cells.
         """
-        for sntc in self.knowledge:
+        while self.worklist:
+            sentence_id = self.worklist.popleft()
+            self.queued.discard(sentence_id)
+            sntc = self.knowledge.get(sentence_id)
+            # Dropped since it was queued
+            if sntc is None:
+                continue
+            self.propagation_steps += 1
+
             # Check if length of set of cells equals count
-            if sntc.count == len(sntc.cells):
+            if sntc.count == len(sntc):
                 # If it does then go ahead and mark all cells therein as mines
                 # List needs to be created due to iterable changing size
-                CellsToMark = []
-                for c in sntc.cells:
-                    CellsToMark.append(c)
-                
-                for c in CellsToMark:
+                for c in list(sntc.cells):
                     self.mark_mine(c)
-                    
-            # Check if count equals zero and there are still cells remaining
-            if sntc.count == 0 and len(sntc.cells) != 0:
-                # If so mark all cells as safe
-                # List needs to be created due to iterable changing size
-                CellsToMark = []
-                for c in sntc.cells:
-                    CellsToMark.append(c)
 
-                for c in CellsToMark:
+            # Check if count equals zero
+            elif sntc.count == 0:
+                # If so mark all cells as safe
+                for c in list(sntc.cells):
                     self.mark_safe(c)
-            
 
     def add_knowledge(self, cell, count):
         """
@@ -219,8 +492,12 @@ class MinesweeperAI():
             5) marks any additional cells as safe or as mines
                if it can be concluded based on the AI's knowledge base
         """
+        self.propagation_steps = 0
+
         # Add current move to moves made and mark as safe
         self.moves_made.add(cell)
+        self.unopened.discard(cell)
+        self.safe_moves.discard(cell)
         self.mark_safe(cell)
         
         # Iterate over a 3x3 surrounding move and add cells if they're in bounds        
@@ -255,80 +532,247 @@ class MinesweeperAI():
         for c in InvalidCells:
             CellsToAdd.remove(c)
             
-        # Add sentence to KB
-        self.knowledge.append(Sentence(CellsToAdd, count))
-        
-        # Keep track of difference sets created, avoid loop
-        down_to = []
-        
-        # Grab sentence1
-        for sntc1 in self.knowledge:
-            # Grab sentence2
-            for sntc2 in self.knowledge:
-                # If the sentences are equal
-                if sntc1.cells == sntc2.cells:
-                    # Move on
-                    continue
-                # If sentence1 is subset of sentence2
-                elif sntc1.cells.issubset(sntc2.cells):
-                    # If subset hasn't been created before
-                    if (sntc2.cells.difference(sntc1.cells)) not in down_to:
-                        down_to.append((sntc2.cells.difference(sntc1.cells)))
-                        # Get the difference of sentence2 with respect to sentence1
-                        diff = sntc2.cells.difference(sntc1.cells)
-                        # Assign the count resulting of subtracting count of sentence1 from count of sentence2
-                        if sntc2.count > sntc1.count:
-                            cnt = sntc2.count - sntc1.count
-                        else:
-                            cnt = sntc1.count - sntc2.count
-                        # Create a new sentence for the difference
-                        self.knowledge.append(Sentence(diff, cnt))
-                elif sntc2.cells.issubset(sntc1.cells):
-                    # If subset hasn't been created before
-                    if (sntc1.cells.difference(sntc2.cells)) not in down_to:
-                        down_to.append((sntc1.cells.difference(sntc2.cells)))
-                        # Get the difference of sentence1 with respect to sentence2
-                        diff = sntc1.cells.difference(sntc2.cells)
-                        # Assign the count resulting of subtracting count of sentence1 from count of sentence2
-                        if sntc2.count > sntc1.count:
-                            cnt = sntc2.count - sntc1.count
-                        else:
-                            cnt = sntc1.count - sntc2.count
-                        # Create a new sentence for the difference
-                        self.knowledge.append(Sentence(diff, cnt))
-                        
+        # Add sentence to KB, inferring what follows from the
+        # sentences that share cells with it
+        self.add_sentence(CellsToAdd, count)
+
         # Update safe cells and mines
         self.updater()
+        self.steps_per_move.append(self.propagation_steps)
 
     def make_safe_move(self):
         """
         Returns a safe cell to choose on the Minesweeper board.
         """
-        for saf in self.safes:
-            if saf not in self.moves_made:
-                return saf
-        
+        for saf in self.safe_moves:
+            return saf
+
         return None
 
     def make_random_move(self):
         """
         Returns a move to make on the Minesweeper board.
         Chooses a move at random if no mades have been made.
-        Chooses among non-made non-mines if moves have already been made.
+        Otherwise chooses among the non-made non-mines least likely
+        to be a mine (see mine_probabilities).
         """
         if len(self.moves_made) == 0:
             return (random.randint(0, self.height - 1), random.randint(0, self.width - 1))
-        
-        possible = []
-        for i in range(self.height):
-            for j in range(self.width):
-                move = (i, j)
-                if move not in self.moves_made and move not in self.mines:
-                    possible.append(move)
-                    
-        
-        if len(possible) != 0:
-            move = possible[random.randint(0, len(possible) - 1)]
-            return move    
-        
-        return None    
+
+        if len(self.unopened) == 0:
+            return None
+
+        probabilities = self.mine_probabilities()
+        if not probabilities:
+            return random.choice(sorted(self.unopened))
+
+        # Pick at random among the cells tied for the lowest risk
+        lowest = min(probabilities.values())
+        possible = sorted(c for c, p in probabilities.items() if p <= lowest + 1e-9)
+        return random.choice(possible)
+
+    def mine_probabilities(self):
+        """
+        Returns the chance that each unopened cell is a mine, given the
+        knowledge base and, if known, the number of mines left.
+
+        Cells in sentences (the frontier) are split into components
+        linked by shared sentences. The mine layouts of each component
+        satisfying all of its sentences are counted, or sampled if there
+        are too many, and layouts of the whole frontier are weighted by
+        the ways of placing the remaining mines among the other unopened
+        cells. Without a mine count each frontier layout is weighted
+        equally, and the other cells are taken to be as likely to be
+        mines as the average frontier cell.
+
+        Returns an empty dict if the knowledge is inconsistent.
+        """
+        components = self.components()
+        frontier = set()
+        for cells, _ in components:
+            frontier.update(cells)
+        others = [c for c in self.unopened if c not in frontier and c not in self.safes]
+
+        # Per component, layouts and mines per cell by number of mines used
+        counts = [self.layouts(cells, sentences) for cells, sentences in components]
+
+        remaining = None if self.mine_count is None else self.mine_count - len(self.mines)
+        weights = {}
+
+        def rest(mines):
+            """
+            Returns the ways of placing the mines left over when the
+            frontier holds `mines` among the other unopened cells.
+            """
+            if remaining is None:
+                return 1
+            if mines not in weights:
+                left = remaining - mines
+                weights[mines] = math.comb(len(others), left) if 0 <= left <= len(others) else 0
+            return weights[mines]
+
+        # Layouts of the whole frontier by number of mines
+        total = {0: 1}
+        for layouts, _ in counts:
+            total = convolve(total, layouts)
+        weight = sum(ways * rest(mines) for mines, ways in total.items())
+        if weight == 0:
+            return {}
+
+        probabilities = {c: 0.0 for c in self.safes if c in self.unopened}
+        for index, (cells, _) in enumerate(components):
+            others_total = {0: 1}
+            for other_index, (layouts, _) in enumerate(counts):
+                if other_index != index:
+                    others_total = convolve(others_total, layouts)
+            # Weight of everything outside this component, by mines in it
+            outside = {
+                mines: sum(ways * rest(mines + more) for more, ways in others_total.items())
+                for mines in counts[index][1]
+            }
+            for position, cell in enumerate(cells):
+                mine_weight = sum(
+                    per_cell[position] * outside[mines]
+                    for mines, per_cell in counts[index][1].items()
+                )
+                probabilities[cell] = mine_weight / weight
+
+        if others and remaining is not None:
+            expected = sum(
+                ways * rest(mines) * (remaining - mines) for mines, ways in total.items()
+            )
+            for c in others:
+                probabilities[c] = expected / weight / len(others)
+        elif others and frontier:
+            # With no mine count, guess the other cells are as
+            # dense in mines as the frontier is expected to be
+            expected = sum(ways * mines for mines, ways in total.items())
+            for c in others:
+                probabilities[c] = expected / weight / len(frontier)
+        return probabilities
+
+    def components(self):
+        """
+        Returns the frontier as a list of (cells, sentences) pairs, each
+        a group of sentences linked by shared cells, with their cells
+        in the order they were reached.
+        """
+        components = []
+        seen = set()
+        for sentence_id in self.knowledge:
+            if sentence_id in seen:
+                continue
+            seen.add(sentence_id)
+            cells = []
+            placed = set()
+            sentences = []
+            stack = [sentence_id]
+            while stack:
+                sentence = self.knowledge[stack.pop()]
+                sentences.append(sentence)
+                for c in sentence.cells:
+                    if c not in placed:
+                        placed.add(c)
+                        cells.append(c)
+                    for other_id in self.containing[self.key(c)]:
+                        if other_id not in seen:
+                            seen.add(other_id)
+                            stack.append(other_id)
+            components.append((cells, sentences))
+        return components
+
+    def layouts(self, cells, sentences):
+        """
+        Returns (layouts, mine_counts) for the mine layouts of `cells`
+        satisfying every sentence: layouts[n] is the number using n
+        mines and mine_counts[n][i] how many of those put a mine in
+        cells[i]. Layouts are sampled once there are too many to count.
+        """
+        position = {c: i for i, c in enumerate(cells)}
+        counts = [sentence.count for sentence in sentences]
+        # Sentences each cell is in, and cells of each sentence still unassigned
+        cell_sentences = [[] for _ in cells]
+        unassigned = []
+        for s, sentence in enumerate(sentences):
+            members = sentence.cells
+            unassigned.append(len(members))
+            for c in members:
+                cell_sentences[position[c]].append(s)
+
+        layouts = {}
+        mine_counts = {}
+
+        def search(order, first_only, limit):
+            """
+            Assigns every cell in turn, trying values in `order()`, and
+            records each layout found, or only the first if `first_only`.
+            Raises OverflowError after `limit` steps.
+            """
+            assignment = [None] * len(cells)
+            choices = [iter(order())] + [None] * (len(cells) - 1)
+            mines_in = [0] * len(sentences)
+            left = list(unassigned)
+            steps = 0
+            i = 0
+            while i >= 0:
+                # Undo this cell's previous value before trying the next
+                if assignment[i] is not None:
+                    for s in cell_sentences[i]:
+                        mines_in[s] -= assignment[i]
+                        left[s] += 1
+                    assignment[i] = None
+                value = next(choices[i], None)
+                if value is None:
+                    i -= 1
+                    continue
+
+                steps += 1
+                if steps > limit:
+                    raise OverflowError
+                # Every sentence of the cell must still be satisfiable
+                if not all(
+                    mines_in[s] + value <= counts[s] <= mines_in[s] + value + left[s] - 1
+                    for s in cell_sentences[i]
+                ):
+                    continue
+                assignment[i] = value
+                for s in cell_sentences[i]:
+                    mines_in[s] += value
+                    left[s] -= 1
+
+                if i + 1 < len(cells):
+                    i += 1
+                    choices[i] = iter(order())
+                    continue
+                mines = sum(assignment)
+                layouts[mines] = layouts.get(mines, 0) + 1
+                per_cell = mine_counts.setdefault(mines, [0] * len(cells))
+                for position, value in enumerate(assignment):
+                    per_cell[position] += value
+                if first_only:
+                    return
+
+        try:
+            search(lambda: (0, 1), False, ENUMERATION_LIMIT)
+        except OverflowError:
+            # Too many to count: draw layouts by searching in random order
+            layouts.clear()
+            mine_counts.clear()
+            for _ in range(SAMPLES):
+                try:
+                    search(lambda: random.sample((0, 1), 2), True, SAMPLE_STEPS * len(cells))
+                except OverflowError:
+                    pass
+        return layouts, mine_counts
+
+
+def convolve(first, second):
+    """
+    Returns the number of layouts by mines used of two independent
+    groups of cells, given the numbers for each.
+    """
+    result = {}
+    for mines, ways in first.items():
+        for more, more_ways in second.items():
+            result[mines + more] = result.get(mines + more, 0) + ways * more_ways
+    return result
@@ -0,0 +1,184 @@
+"""
+Play many seeded Minesweeper games with MinesweeperAI, without pygame
+
+Games are shared out over a process pool. Game n of a run is seeded with
+seed + n, so the games played and their outcomes depend only on the seed
+(only the timings vary between runs). For every board size and mine
+density, prints (and optionally writes) as JSON:
+
+    {
+        "seed": ..., "games": ..., "workers": ...,
+        "results": [
+            {
+                "height": 16, "width": 30, "mines": 99, "density": 0.2,
+                "games": ..., "wins": ..., "win_rate": ...,
+                "moves": {"mean", "p50", "p90", "p99", "max"},
+                "guesses": {...},
+                "move_ms": {...}
+            },
+            ...
+        ]
+    }
+
+where move_ms is the time the AI takes per move, choosing the move and
+then adding what it reveals to its knowledge.
+
+Usage: python simulate.py [--games 100] [--boards 8x8,16x16,16x30]
+    [--densities 0.15,0.2] [--workers N] [--seed 0] [--bitset] [--output FILE]
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import time
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+CHUNKSIZE = 4
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate Minesweeper games headlessly.")
+    parser.add_argument("--games", type=int, default=100, help="games per board and density")
+    parser.add_argument("--boards", default="8x8,16x16,16x30",
+                        help="comma-separated HEIGHTxWIDTH board sizes")
+    parser.add_argument("--densities", default="0.15,0.2",
+                        help="comma-separated fractions of cells holding mines")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bitset", action="store_true", help="store sentences as BitSentence")
+    parser.add_argument("--output", help="also write the JSON to this file")
+    args = parser.parse_args()
+
+    configurations = []
+    for board in args.boards.split(","):
+        height, width = (int(n) for n in board.lower().split("x"))
+        for density in args.densities.split(","):
+            mines = min(height * width - 1, max(1, round(float(density) * height * width)))
+            configurations.append((height, width, mines))
+
+    results = simulate(configurations, args.games, args.seed, args.workers, args.bitset)
+    output = json.dumps({
+        "seed": args.seed, "games": args.games, "workers": args.workers, "results": results
+    }, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+def simulate(configurations, games, seed=0, workers=1, bitset=False):
+    """
+    Plays `games` games for each (height, width, mines) configuration
+    and returns a summary of each, in order.
+    """
+    tasks = [
+        (height, width, mines, seed + game, bitset)
+        for height, width, mines in configurations
+        for game in range(games)
+    ]
+    if workers > 1:
+        with pool_context().Pool(workers) as pool:
+            outcomes = pool.map(play, tasks, CHUNKSIZE)
+    else:
+        outcomes = [play(task) for task in tasks]
+
+    results = []
+    for index, (height, width, mines) in enumerate(configurations):
+        played = outcomes[index * games:(index + 1) * games]
+        wins = sum(outcome["won"] for outcome in played)
+        results.append({
+            "height": height,
+            "width": width,
+            "mines": mines,
+            "density": round(mines / (height * width), 4),
+            "games": games,
+            "wins": wins,
+            "win_rate": round(wins / games, 4) if games else None,
+            "moves": summarise([len(outcome["times"]) for outcome in played], 1),
+            "guesses": summarise([outcome["guesses"] for outcome in played], 1),
+            "move_ms": summarise(
+                [1000 * seconds for outcome in played for seconds in outcome["times"]], 4
+            )
+        })
+    return results
+
+
+def play(task):
+    """
+    Plays one game and returns whether it was won, the guesses made
+    and the AI's time for each move.
+    """
+    height, width, mines, seed, bitset = task
+    # Both the board and the AI's random choices follow the seed
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, bitset=bitset, mine_count=mines)
+
+    safe_cells = height * width - mines
+    times = []
+    guesses = 0
+    won = False
+    while True:
+        start = time.perf_counter()
+        move = ai.make_safe_move()
+        guessed = move is None
+        if guessed:
+            move = ai.make_random_move()
+        elapsed = time.perf_counter() - start
+        if move is None:
+            break
+        if guessed:
+            guesses += 1
+        if game.is_mine(move):
+            times.append(elapsed)
+            break
+
+        nearby = game.nearby_mines(move)
+        start = time.perf_counter()
+        ai.add_knowledge(move, nearby)
+        times.append(elapsed + time.perf_counter() - start)
+
+        if len(ai.moves_made) == safe_cells:
+            won = True
+            break
+
+    return {"won": won, "guesses": guesses, "times": times}
+
+
+def summarise(values, digits):
+    """
+    Returns the mean, median, 90th and 99th percentiles and maximum of `values`.
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    return {
+        "mean": round(sum(values) / len(values), digits),
+        "p50": round(percentile(values, 50), digits),
+        "p90": round(percentile(values, 90), digits),
+        "p99": round(percentile(values, 99), digits),
+        "max": round(values[-1], digits)
+    }
+
+
+def percentile(values, percent):
+    """
+    Nearest-rank percentile of a sorted list.
+    """
+    rank = -(-percent * len(values) // 100)
+    return values[max(0, rank - 1)]
+
+
+def pool_context():
+    """
+    Returns a fork context where available, falling back to spawn elsewhere.
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context("spawn")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Check MinesweeperAI's inference on seeded games
+
+Plays seeded games with MinesweeperAI and feeds every move it makes, and
+the count revealed, to ReferenceAI as well: the original knowledge base,
+which compares every pair of sentences on each move. After every move it
+checks that
+
+    - every mine and safe cell MinesweeperAI has marked is right, and
+      every sentence it holds is true of the board
+    - MinesweeperAI knows every mine and safe cell ReferenceAI knows
+    - replaying the game from the same seed makes the same moves
+
+Prints the moves checked and how often MinesweeperAI knew more than the
+reference, and exits with status 1 if a check failed.
+
+Usage: python verify.py [--games 100] [--height 8] [--width 8] [--mines 10]
+"""
+
+import argparse
+import random
+import sys
+
+from minesweeper import Minesweeper, MinesweeperAI, Sentence
+
+
+class ReferenceAI():
+    """
+    The original inference: every pair of sentences is compared on
+    each move, and the subset differences found are added as sentences.
+    """
+
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.mines = set()
+        self.safes = set()
+        self.knowledge = []
+
+    def mark_mine(self, cell):
+        self.mines.add(cell)
+        for sentence in self.knowledge:
+            sentence.mark_mine(cell)
+
+    def mark_safe(self, cell):
+        self.safes.add(cell)
+        for sentence in self.knowledge:
+            sentence.mark_safe(cell)
+
+    def add_knowledge(self, cell, count):
+        self.mark_safe(cell)
+        cells = set()
+        for i in range(cell[0] - 1, cell[0] + 2):
+            for j in range(cell[1] - 1, cell[1] + 2):
+                if (i, j) != cell and 0 <= i < self.height and 0 <= j < self.width:
+                    cells.add((i, j))
+        if count == 0:
+            for c in cells:
+                self.mark_safe(c)
+        for c in list(cells):
+            if c in self.mines:
+                count -= 1
+                cells.remove(c)
+            elif c in self.safes:
+                cells.remove(c)
+        self.knowledge.append(Sentence(cells, count))
+
+        # Each difference is added once per move, as in the original
+        differences = []
+        for first in self.knowledge:
+            for second in self.knowledge:
+                if first.cells == second.cells:
+                    continue
+                if first.cells.issubset(second.cells):
+                    small, large = first, second
+                elif second.cells.issubset(first.cells):
+                    small, large = second, first
+                else:
+                    continue
+                difference = large.cells - small.cells
+                if difference not in differences:
+                    differences.append(difference)
+                    self.knowledge.append(Sentence(difference, abs(large.count - small.count)))
+
+        # A single pass marking what each sentence settles
+        for sentence in self.knowledge:
+            if sentence.cells and sentence.count == len(sentence.cells):
+                for c in list(sentence.cells):
+                    self.mark_mine(c)
+            elif sentence.count == 0 and sentence.cells:
+                for c in list(sentence.cells):
+                    self.mark_safe(c)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check MinesweeperAI against the original inference.")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--height", type=int, default=8)
+    parser.add_argument("--width", type=int, default=8)
+    # ReferenceAI slows down quickly as boards and mine counts grow
+    parser.add_argument("--mines", type=int, default=10)
+    args = parser.parse_args()
+    games, height, width, mines = args.games, args.height, args.width, args.mines
+
+    failures = []
+    moves = 0
+    ahead = 0
+    for seed in range(games):
+        played, checked, knew_more, problems = check_game(height, width, mines, seed)
+        moves += checked
+        ahead += knew_more
+        failures.extend(f"seed {seed}: {problem}" for problem in problems)
+        # A game with a failure stops early, so its replay would differ anyway
+        if not problems and check_game(height, width, mines, seed, reference=False)[0] != played:
+            failures.append(f"seed {seed}: replay made different moves")
+
+    for failure in failures:
+        print(failure)
+    print(f"Checked {moves} moves in {games} games on {height}x{width} with {mines} mines: "
+          f"MinesweeperAI knew more than the reference after {ahead}, "
+          f"{len(failures)} failures.")
+    if failures:
+        sys.exit(1)
+
+
+def check_game(height, width, mines, seed, reference=True):
+    """
+    Plays one seeded game. Returns the moves played, the number of moves
+    checked, how many left MinesweeperAI knowing more than ReferenceAI,
+    and a description of each failed check. Without `reference` only the
+    moves are played, as for a replay.
+    """
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, mine_count=mines)
+    original = ReferenceAI(height, width) if reference else None
+
+    played = []
+    knew_more = 0
+    problems = []
+    while len(ai.moves_made) < height * width - mines:
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+        if move is None or game.is_mine(move):
+            break
+        played.append(move)
+        count = game.nearby_mines(move)
+        ai.add_knowledge(move, count)
+        if original is None:
+            continue
+        original.add_knowledge(move, count)
+
+        if not ai.mines <= game.mines or ai.safes & game.mines:
+            problems.append(f"wrong mark after move {len(played)}")
+        for sentence in ai.knowledge.values():
+            if len(sentence.cells & game.mines) != sentence.count:
+                problems.append(f"false sentence {sentence} after move {len(played)}")
+        if not original.mines <= ai.mines or not original.safes <= ai.safes:
+            problems.append(f"missed a deduction of the reference after move {len(played)}")
+        elif original.mines != ai.mines or original.safes != ai.safes:
+            knew_more += 1
+        if problems:
+            break
+    return played, len(played), knew_more, problems
+
+
+if __name__ == "__main__":
+    main()